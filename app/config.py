@@ -54,6 +54,39 @@ DEFAULT_FONT = "Segoe UI"
 DEFAULT_FPS = 144
 
 DEFAULT_SEARCH_DEPTH = 3
+MAX_SEARCH_DEPTH = 64
+MAX_SEARCH_NODES = None
+SEARCH_MOVE_TIME_MS = None
+DEFAULT_MOVE_TIME_MS = 2000
+TIME_MANAGEMENT_MOVES_TO_GO = 30
+TIME_MANAGEMENT_INCREMENT_USAGE = 0.8
+TIME_MANAGEMENT_MAX_USAGE = 0.25
+TIME_MANAGEMENT_NEXT_ITERATION_RATIO = 0.5
+MOVE_OVERHEAD_MS = 50
+MIN_MOVE_TIME_MS = 20
+SEARCH_SHUFFLE = False
+SEARCH_SEED = None
+SEARCH_WORKERS = 1
+QUIESCENCE_SEARCH = True
+QUIESCENCE_DELTA_MARGIN = 200
+NULL_MOVE_PRUNING = True
+NULL_MOVE_REDUCTION = 2
+NULL_MOVE_MIN_DEPTH = 3
+LATE_MOVE_REDUCTIONS = True
+LMR_MIN_DEPTH = 3
+LMR_MIN_MOVE_NUMBER = 3
+LMR_REDUCTION = 1
+PRINCIPAL_VARIATION_SEARCH = True
+ASPIRATION_WINDOWS = True
+ASPIRATION_WINDOW = 25
+PONDERING = False
+SEARCH_STOP_TIMEOUT_MS = 1000
+OPENING_BOOK = True
+OPENING_BOOK_PATH = os.path.join(ASSETS_DIR, "book.bin")
+BOOK_MAX_PLY = 24
+TRANSPOSITION_TABLE_SIZE_MB = 16
+
+PIECE_VALUES = {'p' : 1, 'n' : 3, 'b' : 3, 'r' : 5, 'q' : 9, 'k' : 0}
 
 DEFAULT_TIME_CONTROL = "3+2"
 
@@ -71,7 +104,7 @@ WHITE_VICTORY_BY_TIMEOUT = 107
 BLACK_VICTORY_BY_TIMEOUT = 108
 DRAW_BY_TIMEOUT_AGAINST_INSUFFICIENT_MATERIAL = 109
 
-INF = 9999
+INF = 32000
 
 LOCAL = 201
 AS_HOST = 202
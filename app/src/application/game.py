@@ -81,11 +81,12 @@ class Game:
 
     def run_against_computer(self):
         """
-        Run the game locally against a computer. Use mouse for input
+        Run the game locally against a computer. Use mouse for input.
+        The computer's searches are stopped however the game is left, so no search thread outlives the game
         """
         self.board_view = boardview.BoardView(self.chessboard, self.chessclock, flip = False if self.start_as_white else True)
         self.player = LocalHumanPlayer(0 if self.start_as_white else 1, self.chessboard, self.board_view)
-        self.computer = ComputerPlayer(1 if self.start_as_white else 0, self.chessboard)
+        self.computer = ComputerPlayer(1 if self.start_as_white else 0, self.chessboard, self.chessclock)
         if self.chessclock is not None:
             self.chessclock.start(self.chessboard.to_move)
         while self.running:
@@ -119,6 +120,7 @@ class Game:
                     self.chessclock.pause()
                 self.computer.stop_calculating()
                 return self.display_result(self.chessboard.get_result())
+        self.computer.stop_calculating()
         return None
 
  
@@ -2,40 +2,128 @@
 Module for the AI class
 """
 
-from app.src.engine import game_logic as gl, chessboard
+from app.src.engine import game_logic as gl, book, chessboard, evaluation, moveordering, transposition as tt
+from app.src.engine.clock import ChessClock
 from app import config as cf
+from array import array
+from concurrent.futures import CancelledError, ProcessPoolExecutor, as_completed, wait
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import random
 import threading
+import time
 from copy import deepcopy
 
 class AI():
     """
     Class used for calculating chess moves
     """
-    def __init__(self):
+    def __init__(self, max_depth: int = cf.MAX_SEARCH_DEPTH, max_nodes: int | None = cf.MAX_SEARCH_NODES, 
+                 move_time: float | None = cf.SEARCH_MOVE_TIME_MS, shuffle: bool = cf.SEARCH_SHUFFLE, seed: int | None = cf.SEARCH_SEED,
+                 workers: int = cf.SEARCH_WORKERS, ponder: bool = cf.PONDERING, book_path: str | None = cf.OPENING_BOOK_PATH,
+                 table_size_mb: float = cf.TRANSPOSITION_TABLE_SIZE_MB):
+        """
+        AI takes the hard search limits as constructor arguments - the maximum depth of iterative deepening, 
+        the maximum number of searched nodes and a fixed time per move in milliseconds, None meaning no limit.
+        If shuffle is True, moves are shuffled before ordering so equally ranked moves are tried in random order,
+        the shuffle is reproducible if a seed is provided.
+        With more than one worker, root moves are searched in parallel by that many worker processes, started with the AI.
+        If ponder is True, the AI keeps searching on the opponent's time after handing out its move.
+        Moves are taken from the opening book at the book path instead of searching while the position is in the book,
+        the book is only opened when first needed. The transposition tables take the arg memory budget in megabytes,
+        split evenly between the main process and the worker processes
+        """
         self.calculated_move = None
         self.running_thread = None
         self.running = True
+        self.table_size_mb = table_size_mb
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.move_time = move_time
+        self.nodes = 0
+        self.deadline = None
+        self.stopped = False
+        self.completed_depth = 0
+        self.shuffle = shuffle
+        self.rng = random.Random(seed)
+        self.move_orderer = moveordering.MoveOrderer(max_depth + 1)
+        self.use_quiescence = cf.QUIESCENCE_SEARCH
+        self.use_null_move = cf.NULL_MOVE_PRUNING
+        self.use_lmr = cf.LATE_MOVE_REDUCTIONS
+        self.use_pvs = cf.PRINCIPAL_VARIATION_SEARCH
+        self.use_aspiration = cf.ASPIRATION_WINDOWS
+        self.iteration_results = []
+        self.workers = workers
+        self.transposition_table = tt.TranspositionTable(self.table_share_mb())
+        self.executor = None
+        self.worker_startup = []
+        self.stop_event = None
+        self.worker_stop_event = None
+        self.search_start = None
+        self.time_budget = None
+        self.ponder = ponder
+        self.ponder_thread = None
+        self.ponder_key = None
+        self.ponder_hit = False
+        self.ponder_result = None
+        self.stop_token = threading.Event()
+        self.book_path = book_path if cf.OPENING_BOOK else None
+        self.book = None
+        if self.workers > 1:
+            self.get_executor()
 
-    def poll_for_move(self, chessboard: chessboard.Chessboard):
+    def poll_for_move(self, chessboard: chessboard.Chessboard, chessclock: ChessClock = None):
         """
         Returns the currently calculated move if there is one, else returns None
-        If there is no calculated move and no move is being calculated, starts calculating a new move
+        If there is no calculated move and no move is being calculated, starts calculating a new move,
+        with its time budget taken from the chess clock in argument if there is one.
+        If the AI has been pondering, the opponent's move decides whether the ponder search is reused or discarded
         """
         if not self.running:
             return None
+        if self.ponder_thread is not None:
+            self.resolve_ponder(chessboard, chessclock)
+            if self.ponder_thread is not None:
+                return None
         if self.calculated_move is not None:
             res = self.calculated_move
             self.calculated_move = None
+            self.start_pondering(chessboard, res)
             return res
         if self.running_thread is None:
-            self.calculate_best_move(chessboard)
+            self.calculate_best_move(chessboard, chessclock)
         return None
 
-    def quit(self):
+    def quit(self, timeout: float | None = cf.SEARCH_STOP_TIMEOUT_MS) -> bool:
         """
-        Disallows further calculation of moves
+        Disallows further calculation of moves, stops the running searches waiting for them at most the arg timeout
+        in milliseconds and shuts the worker processes down. Returns True if no search thread is left running
         """
         self.running = False
+        stopped = self.stop_search(timeout)
+        if self.executor is not None:
+            self.executor.shutdown(wait = False, cancel_futures = True)
+            self.executor = None
+        if self.book is not None:
+            self.book.close()
+            self.book = None
+        return stopped
+
+    def stop_search(self, timeout: float | None = cf.SEARCH_STOP_TIMEOUT_MS) -> bool:
+        """
+        Signal the running search and ponder search to stop through the stop token, which the searches check together with
+        their other limits, and the worker processes through the worker stop event. Waits at most the arg timeout in milliseconds 
+        for the search threads to finish, None meaning no timeout. Returns True if no search thread is left running.
+        The stop token stays set until a new search is started, so a search which has not finished yet keeps stopping
+        """
+        self.stop_token.set()
+        if self.worker_stop_event is not None:
+            self.worker_stop_event.set()
+        deadline = None if timeout is None else time.time() + timeout / 1000
+        threads = [thread for thread in (self.running_thread, self.ponder_thread) if thread is not None]
+        for thread in threads:
+            thread.join(None if deadline is None else max(deadline - time.time(), 0))
+        return not any(thread.is_alive() for thread in threads)
 
     def minimax(self, chessboard: chessboard.Chessboard, depth: int = cf.DEFAULT_SEARCH_DEPTH) -> tuple[int, gl.Move | None]:
         """
@@ -69,59 +157,373 @@ class AI():
                 best_move = move
         return min_eval, best_move
 
-    def minimax_with_pruning(self, board_state: gl.BoardState, to_move: int, depth: int = cf.DEFAULT_SEARCH_DEPTH, initial_depth = None,
-                            alpha: int = -cf.INF, beta: int = cf.INF) -> tuple[int, gl.Move | None]:
+    def minimax_with_pruning(self, board_state: gl.BoardState, to_move: int, depth: int = cf.DEFAULT_SEARCH_DEPTH, ply: int = 0,
+                            alpha: int = -cf.INF, beta: int = cf.INF, root_moves: array = None, allow_null: bool = True) -> tuple[int, int | None]:
         """
-        Minimax algorithm with alpha-beta pruning, uses only the raw BoardState object instead of the Chessboard object 
-        and limits the calculation of legal moves to a minimum to boost performance.
-        Takes a board state, player color and max depth as arguments, returns a move maximizing/minimizing material count 
-        heuristic based on color, always preferring moves that lead to the fastest checkmate.
+        Minimax algorithm with alpha-beta pruning, uses only the raw BoardState object instead of the Chessboard object,
+        playing and taking back moves in the packed integer form on it, so it is left unchanged once the search returns.
+        Takes a board state, player color, remaining depth and the number of plies from the root as arguments, returns a move
+        maximizing/minimizing the evaluation heuristic based on color, always preferring moves that lead to the fastest checkmate.
+        If root moves are provided, only they are searched at the root. The result is meaningless once the search is stopped.
         Also inspired by https://www.youtube.com/watch?v=l-hh51ncgDI&ab_channel=SebastianLague
         """
-        if initial_depth is None:
-            initial_depth = depth
         best_move = None
-        no_legal_moves = True
-        if to_move == 0:
-            final_eval = -cf.INF
-            for move in board_state.get_all_pseudo_legal_moves(to_move):
-                board_copy = deepcopy(board_state)
-                if not board_copy.push_move(move, pseudo_legality_check = False) or board_copy.king_in_check(to_move):
-                    continue
-                no_legal_moves = False
-                if depth == 0:
-                    break
-                eval, _ = self.minimax_with_pruning(board_copy, 1 - to_move, depth - 1, initial_depth, alpha, beta)
-                if eval > final_eval:
-                    final_eval = eval
-                    best_move = move
+        if depth <= 0 and self.use_quiescence:
+            return self.quiescence(board_state, to_move, alpha, beta, ply), best_move
+        self.nodes += 1
+        if self.nodes & 1023 == 0:
+            self.check_limits()
+        if self.stopped:
+            return 0, best_move
+        hash_move = None
+        key = board_state.zobrist_key
+        # an entry searched at least as deep narrows the window or cuts the node off, any entry gives the move to try first
+        if depth > 0:
+            entry = self.transposition_table.probe(key)
+            if entry is not None:
+                entry_depth, entry_score, bound, hash_move = entry
+                if hash_move == 0:
+                    hash_move = None
+                if entry_depth >= depth and ply > 0:
+                    score = tt.score_from_table(entry_score, ply)
+                    if bound == tt.BOUND_EXACT:
+                        return score, hash_move
+                    if bound == tt.BOUND_LOWER:
+                        alpha = max(alpha, score)
+                    elif bound == tt.BOUND_UPPER:
+                        beta = min(beta, score)
+                    if beta <= alpha:
+                        return score, hash_move
+        moves = board_state.get_all_legal_moves(to_move, self.shuffle and depth > 0, self.rng)
+        if len(moves) == 0:
+            if board_state.king_in_check(to_move):
+                return (cf.INF - ply if to_move == 1 else -cf.INF + ply), best_move
+            return 0, best_move
+        if depth <= 0:
+            return self.evaluate(board_state), best_move
+        in_check = board_state.king_in_check(to_move)
+
+        # null move pruning - if passing still fails high, so would a real move. Not in check, right after another null move
+        # or with pawns only, where passing could be better than any move (zugzwang)
+        if (self.use_null_move and allow_null and ply > 0 and not in_check and depth >= cf.NULL_MOVE_MIN_DEPTH and
+            board_state.has_non_pawn_material(to_move)):
+            eval = self.null_move_search(board_state, to_move, depth, ply, alpha, beta)
+            if self.stopped:
+                return 0, None
+            if eval is not None:
+                self.transposition_table.store(key, depth, tt.score_to_table(eval, ply), tt.BOUND_LOWER if to_move == 0 else tt.BOUND_UPPER, None)
+                return eval, None
+
+        if root_moves is not None:
+            moves = root_moves
+        moves = self.move_orderer.order_moves(board_state, moves, ply, hash_move)
+        window_alpha, window_beta = alpha, beta
+        final_eval = -cf.INF if to_move == 0 else cf.INF
+        for i, move in enumerate(moves):
+            quiet = self.move_orderer.is_quiet(board_state, move)
+            undo = board_state.make_move(move)
+            # late move reductions - quiet moves ordered late which do not give check are searched shallower first
+            reduction = 0
+            if (self.use_lmr and i >= cf.LMR_MIN_MOVE_NUMBER and depth >= cf.LMR_MIN_DEPTH and quiet and not in_check and
+                not board_state.king_in_check(1 - to_move)):
+                reduction = cf.LMR_REDUCTION
+            if i == 0:
+                eval, _ = self.minimax_with_pruning(board_state, 1 - to_move, depth - 1, ply + 1, alpha, beta)
+            else:
+                # principal variation search - later moves are only proven no better than the first one with a zero window,
+                # a move failing that or a reduced move beating the bound is searched again
+                if self.use_pvs:
+                    child_alpha, child_beta = (alpha, alpha + 1) if to_move == 0 else (beta - 1, beta)
+                else:
+                    child_alpha, child_beta = alpha, beta
+                eval, _ = self.minimax_with_pruning(board_state, 1 - to_move, depth - 1 - reduction, ply + 1, child_alpha, child_beta)
+                if reduction > 0 and not self.stopped and (eval > alpha if to_move == 0 else eval < beta):
+                    eval, _ = self.minimax_with_pruning(board_state, 1 - to_move, depth - 1, ply + 1, child_alpha, child_beta)
+                if self.use_pvs and not self.stopped and alpha < eval < beta:
+                    eval, _ = self.minimax_with_pruning(board_state, 1 - to_move, depth - 1, ply + 1, alpha, beta)
+            board_state.unmake_move(undo)
+            if self.stopped:
+                return 0, None
+            if eval > final_eval if to_move == 0 else eval < final_eval:
+                final_eval = eval
+                best_move = move
+            if to_move == 0:
                 alpha = max(alpha, eval)
-                if beta <= alpha:
-                    break
+            else:
+                beta = min(beta, eval)
+            if beta <= alpha:
+                self.move_orderer.store_cutoff(board_state, move, ply, to_move, depth)
+                break
+        if final_eval <= window_alpha:
+            bound = tt.BOUND_UPPER
+        elif final_eval >= window_beta:
+            bound = tt.BOUND_LOWER
+        else:
+            bound = tt.BOUND_EXACT
+        if root_moves is None:
+            self.transposition_table.store(key, depth, tt.score_to_table(final_eval, ply), bound, best_move)
+        return final_eval, best_move
+
+    def null_move_search(self, board_state: gl.BoardState, to_move: int, depth: int, ply: int, alpha: int, beta: int) -> int | None:
+        """
+        Let the player of arg color pass and search the resulting position to a reduced depth with a zero window at the bound
+        the player has to beat. Return the evaluation to cut the node off with if the search still fails high for the player
+        on move, else None. Only worth trying if the static evaluation already reaches the bound, and never against mate scores,
+        as passing cannot prove a mate
+        """
+        if to_move == 0:
+            if beta > tt.MATE_THRESHOLD or self.evaluate(board_state) < beta:
+                return None
+            child_alpha, child_beta = beta - 1, beta
+        else:
+            if alpha < -tt.MATE_THRESHOLD or self.evaluate(board_state) > alpha:
+                return None
+            child_alpha, child_beta = alpha, alpha + 1
+        reduction = cf.NULL_MOVE_REDUCTION + (1 if depth > 6 else 0)
+        undo = board_state.make_null_move()
+        eval, _ = self.minimax_with_pruning(board_state, 1 - to_move, depth - 1 - reduction, ply + 1, child_alpha, child_beta, allow_null = False)
+        board_state.unmake_null_move(undo)
+        if self.stopped:
+            return None
+        if to_move == 0 and eval >= beta:
+            return beta
+        if to_move == 1 and eval <= alpha:
+            return alpha
+        return None
+
+    def quiescence(self, board_state: gl.BoardState, to_move: int, alpha: int, beta: int, ply: int) -> int:
+        """
+        Quiescence search extending the leaves of minimax with pruning through captures and promotions only, so that positions
+        are evaluated once they are quiet instead of in the middle of an exchange. The player on move may stand pat - settle for
+        the static evaluation instead of capturing - unless in check, in which case all evasions are searched and checkmate is
+        detected. Delta pruning skips captures that could not bring the evaluation back to the bound even if the captured piece
+        was won for free with the delta margin on top. Takes the number of plies from the root for scoring mates
+        """
+        self.nodes += 1
+        if self.nodes & 1023 == 0:
+            self.check_limits()
+        if self.stopped:
+            return 0
+        stand_pat = None
+        if board_state.king_in_check(to_move):
+            moves = board_state.get_all_legal_moves(to_move)
+            if len(moves) == 0:
+                return -cf.INF + ply if to_move == 0 else cf.INF - ply
+            final_eval = -cf.INF if to_move == 0 else cf.INF
         else:
-            final_eval = cf.INF
-            for move in board_state.get_all_pseudo_legal_moves(to_move):
-                board_copy = deepcopy(board_state)
-                if not board_copy.push_move(move, pseudo_legality_check = False) or board_copy.king_in_check(to_move):
+            stand_pat = self.evaluate(board_state)
+            if to_move == 0:
+                if stand_pat >= beta:
+                    return stand_pat
+                alpha = max(alpha, stand_pat)
+            else:
+                if stand_pat <= alpha:
+                    return stand_pat
+                beta = min(beta, stand_pat)
+            moves = board_state.get_legal_captures(to_move)
+            final_eval = stand_pat
+
+        for move in self.move_orderer.order_moves(board_state, moves, ply):
+            if stand_pat is not None:
+                gain = self.capture_gain(board_state, move) + cf.QUIESCENCE_DELTA_MARGIN
+                if (stand_pat + gain <= alpha) if to_move == 0 else (stand_pat - gain >= beta):
                     continue
-                no_legal_moves = False
-                if depth == 0:
-                    break
-                eval, _ = self.minimax_with_pruning(board_copy, 1 - to_move, depth - 1, initial_depth, alpha, beta)
-                if eval < final_eval:
-                    final_eval = eval
-                    best_move = move
+            undo = board_state.make_move(move)
+            eval = self.quiescence(board_state, 1 - to_move, alpha, beta, ply + 1)
+            board_state.unmake_move(undo)
+            if self.stopped:
+                return 0
+            if to_move == 0:
+                final_eval = max(final_eval, eval)
+                alpha = max(alpha, eval)
+            else:
+                final_eval = min(final_eval, eval)
                 beta = min(beta, eval)
-                if beta <= alpha:
-                    break
-        if depth == 0 and not no_legal_moves:
-            return board_state.get_material_count(0) - board_state.get_material_count(1), best_move
-        if no_legal_moves:
-            if board_state.king_in_check(to_move):
-                return ((cf.INF - initial_depth + depth) if to_move == 1 else (-cf.INF + initial_depth - depth)), best_move
-            return 0, best_move
-        return final_eval, best_move
+            if beta <= alpha:
+                break
+        return final_eval
+
+    def evaluate(self, board_state: gl.BoardState) -> int:
+        """
+        Return the static evaluation of the board state in argument in centipawns from the white point of view,
+        the tapered piece-square table score kept up to date by the board state
+        """
+        return board_state.get_evaluation()
+
+    def capture_gain(self, board_state: gl.BoardState, move: int) -> int:
+        """
+        Return an upper bound of the material in centipawns gained by the arg packed capture or promotion if the moving piece 
+        is not recaptured
+        """
+        victim = board_state.mailbox[gl.move_dst(move)]
+        if victim is not None:
+            gain = evaluation.MAX_PIECE_VALUES[victim[1]]
+        elif gl.move_flag(move) == gl.MOVE_EN_PASSANT:
+            gain = evaluation.MAX_PIECE_VALUES['p']
+        else:
+            gain = 0
+        promotion_type = gl.move_promotion_type(move)
+        if promotion_type is not None:
+            gain += evaluation.MAX_PIECE_VALUES[promotion_type] - evaluation.MAX_PIECE_VALUES['p']
+        return gain
+
+    def check_limits(self):
+        """
+        Stop the current search if it has exceeded its node limit or its deadline, or if the stop event or the stop token is set.
+        The stop event is only set on the AI objects of the worker processes of the parallel search
+        """
+        if ((self.max_nodes is not None and self.nodes >= self.max_nodes) or (self.deadline is not None and time.time() >= self.deadline) or
+            (self.stop_event is not None and self.stop_event.is_set()) or self.stop_token.is_set()):
+            self.stopped = True
+
+    def allocate_time(self, chessclock: ChessClock | None, color: int) -> float:
+        """
+        Return the time budget in milliseconds for the next move of the player of arg color.
+        With a clock the budget is an equal share of the remaining time over the expected number of moves to go
+        plus most of the increment, capped to a fraction of the remaining time and reduced by the move overhead.
+        Without a clock the default move time is used, a fixed move time limit caps the budget in both cases
+        """
+        if chessclock is None:
+            budget = cf.DEFAULT_MOVE_TIME_MS
+        else:
+            remaining = chessclock.remaining_times[color]
+            budget = remaining / cf.TIME_MANAGEMENT_MOVES_TO_GO + chessclock.increment * cf.TIME_MANAGEMENT_INCREMENT_USAGE
+            budget = min(budget, remaining * cf.TIME_MANAGEMENT_MAX_USAGE) - cf.MOVE_OVERHEAD_MS
+        if self.move_time is not None:
+            budget = min(budget, self.move_time)
+        return max(budget, cf.MIN_MOVE_TIME_MS)
+
+    def iterative_deepening(self, board_state: gl.BoardState, to_move: int, time_budget: float | None = None, 
+                            root_moves: array = None) -> tuple[int, int | None]:
+        """
+        Search the board state in argument with minimax with pruning to increasing depths until the depth limit is reached,
+        the node limit or the time budget in milliseconds runs out, or a forced mate is found. Without a time budget the search
+        runs until it is stopped, a budget may still be set through time_budget and deadline while it runs. Only the root moves in argument
+        are searched if provided. The (depth, evaluation, best move) results of all completed iterations are kept in iteration_results.
+        Every iteration starts from the best moves of the previous one stored in the transposition table
+        and if aspiration windows are enabled, searches a narrow window around the evaluation of the previous one.
+        A new iteration is not started once most of the budget is spent, as it would not finish in time.
+        Returns the evaluation and the best move in the packed integer form of the deepest completed iteration
+        """
+        self.nodes = 0
+        self.stopped = False
+        self.completed_depth = 0
+        self.iteration_results = []
+        self.search_start = time.time()
+        self.time_budget = time_budget
+        self.deadline = None if time_budget is None else self.search_start + time_budget / 1000
+        self.transposition_table.new_search()
+        self.move_orderer.new_search()
+        best_eval, best_move = 0, None
+        for depth in range(1, self.max_depth + 1):
+            self.check_limits()
+            if self.stopped:
+                break
+            if self.use_aspiration and depth > 1 and abs(best_eval) <= tt.MATE_THRESHOLD:
+                eval, move = self.aspiration_search(board_state, to_move, depth, best_eval, root_moves)
+            else:
+                eval, move = self.minimax_with_pruning(board_state, to_move, depth, root_moves = root_moves)
+            if self.stopped:
+                break
+            best_eval, best_move = eval, move
+            self.completed_depth = depth
+            self.iteration_results.append((depth, eval, move))
+            if move is None or abs(eval) > tt.MATE_THRESHOLD:
+                break
+            if self.time_budget is not None and (time.time() - self.search_start) * 1000 > self.time_budget * cf.TIME_MANAGEMENT_NEXT_ITERATION_RATIO:
+                break
+        return best_eval, best_move
 
+    def aspiration_search(self, board_state: gl.BoardState, to_move: int, depth: int, expected_eval: int, 
+                          root_moves: array = None) -> tuple[int, int | None]:
+        """
+        Search the root to the arg depth with a narrow window around the expected evaluation, a narrow window cuts off more
+        of the tree. If the result falls outside the window, the window is widened on that side and the root is searched again 
+        until the result fits or the window already spans the whole score range on that side.
+        Returns the evaluation and the best move in the packed integer form
+        """
+        delta = cf.ASPIRATION_WINDOW
+        alpha, beta = expected_eval - delta, expected_eval + delta
+        while True:
+            eval, move = self.minimax_with_pruning(board_state, to_move, depth, alpha = alpha, beta = beta, root_moves = root_moves)
+            if self.stopped:
+                return eval, move
+            delta *= 2
+            if eval <= alpha and alpha > -cf.INF:
+                alpha = max(expected_eval - delta, -cf.INF)
+            elif eval >= beta and beta < cf.INF:
+                beta = min(expected_eval + delta, cf.INF)
+            else:
+                return eval, move
+
+    def table_share_mb(self) -> float:
+        """
+        Return the memory budget in megabytes of each transposition table - the whole budget without workers,
+        else an even share of it for the table of the main process and the table of every worker
+        """
+        if self.workers > 1:
+            return self.table_size_mb / (self.workers + 1)
+        return self.table_size_mb
+
+    def get_executor(self) -> ProcessPoolExecutor:
+        """
+        Return the pool of worker processes of the parallel search, starting it on first use.
+        Workers are spawned rather than forked so they do not inherit the state of the GUI process,
+        all of them share the worker stop event used to end a parallel search early. The event is only checked by the workers,
+        so it never stops a search of the main process. Every worker is sent a startup task right away, so the processes
+        are spawned and have imported the engine before the first search needs them
+        """
+        if self.executor is None:
+            context = multiprocessing.get_context('spawn')
+            self.worker_stop_event = context.Event()
+            self.executor = ProcessPoolExecutor(max_workers = self.workers, mp_context = context, 
+                                                initializer = init_worker, initargs = (self.worker_stop_event, self.table_share_mb()))
+            self.worker_startup = [self.executor.submit(start_worker) for _ in range(self.workers)]
+        return self.executor
+
+    def parallel_search(self, board_state: gl.BoardState, to_move: int, time_budget: float) -> tuple[int, int | None]:
+        """
+        Search the board state in argument in parallel - the ordered legal root moves are dealt round-robin to the worker processes,
+        each of them runs iterative deepening on its share until the common deadline. The position is sent as a fen string 
+        and the moves as the bytes of a packed move array. The results are compared at the deepest depth completed by every worker,
+        except for workers which stopped early on a forced mate - their last result stands. Once a worker reports a forced mate
+        for the player on move, the others are stopped. Returns the evaluation and the best move in the packed integer form
+        """
+        moves = board_state.get_all_legal_moves(to_move)
+        if len(moves) < 2:
+            return self.iterative_deepening(board_state, to_move, time_budget)
+        moves = self.move_orderer.order_moves(board_state, moves, 0)
+        shares = [array('H') for _ in range(min(self.workers, len(moves)))]
+        for i, move in enumerate(moves):
+            shares[i % len(shares)].append(move)
+        fen = board_state.to_fen()
+        max_nodes = None if self.max_nodes is None else self.max_nodes // len(shares)
+        try:
+            executor = self.get_executor()
+            wait(self.worker_startup)
+            deadline = time.time() + time_budget / 1000
+            self.worker_stop_event.clear()
+            if self.stop_token.is_set():
+                self.worker_stop_event.set()
+            futures = [executor.submit(search_root_moves, fen, share.tobytes(), deadline, self.max_depth, max_nodes) for share in shares]
+            results = []
+            for future in as_completed(futures):
+                worker_results, nodes = future.result()
+                results.append((worker_results, nodes))
+                if len(worker_results) != 0 and worker_results[-1][1] * (1 if to_move == 0 else -1) > tt.MATE_THRESHOLD:
+                    self.worker_stop_event.set()
+            self.worker_stop_event.clear()
+        except (CancelledError, BrokenProcessPool, RuntimeError):
+            return 0, None
+        self.nodes = sum(nodes for _, nodes in results)
+        iteration_results = [worker_results for worker_results, _ in results if len(worker_results) != 0]
+        if len(iteration_results) == 0:
+            return 0, None
+        unfinished = [len(worker_results) for worker_results in iteration_results if abs(worker_results[-1][1]) <= tt.MATE_THRESHOLD]
+        self.completed_depth = min(unfinished) if len(unfinished) != 0 else max(len(worker_results) for worker_results in iteration_results)
+        candidates = [worker_results[min(self.completed_depth, len(worker_results)) - 1] for worker_results in iteration_results]
+        _, best_eval, best_move = (max if to_move == 0 else min)(candidates, key = lambda result: result[1])
+        return best_eval, best_move
 
     def execute_minimax(self, chessboard:chessboard.Chessboard):
         """
@@ -130,22 +532,170 @@ class AI():
         _, self.calculated_move = self.minimax(chessboard)
         self.running_thread = None
 
-    def execute_minimax_with_pruning(self, chessboard:chessboard.Chessboard):
+    def execute_minimax_with_pruning(self, chessboard: chessboard.Chessboard, chessclock: ChessClock = None):
         """
-        Creates a new thread and calls the minimax with pruning function on it, stores the resulting move
+        Runs iterative deepening with minimax with pruning within the time budget given by the chess clock in argument,
+        stores the resulting move
         """
         board_state = deepcopy(chessboard.board_state)
         to_move = chessboard.to_move
-        _, self.calculated_move = self.minimax_with_pruning(board_state, to_move)
+        time_budget = self.allocate_time(chessclock, to_move)
+        if self.workers > 1:
+            _, best_move = self.parallel_search(board_state, to_move, time_budget)
+        else:
+            _, best_move = self.iterative_deepening(board_state, to_move, time_budget)
+        self.calculated_move = board_state.decode_move(best_move) if best_move is not None else None
         if self.calculated_move is None and not chessboard.ended:
             self.calculated_move = chessboard.get_all_legal_moves()[0]
         self.running_thread = None
 
-    def calculate_best_move(self, chessboard: chessboard.Chessboard):
+    def calculate_best_move(self, chessboard: chessboard.Chessboard, chessclock: ChessClock = None):
+        """
+        If no move is currently being calculated, calls the execute minimax with pruning function on a new daemon thread,
+        so an abandoned search never keeps the application alive. If the position is in the opening book,
+        the book move is taken instead and no search is started
+        """
+        if self.running_thread is not None or self.ponder_thread is not None:
+            return
+        book_move = self.get_book_move(chessboard)
+        if book_move is not None:
+            self.calculated_move = book_move
+            return
+        self.stop_token.clear()
+        self.running_thread = threading.Thread(target = self.execute_minimax_with_pruning, args = (chessboard, chessclock), daemon = True)
+        self.running_thread.start()
+
+    def get_book(self) -> book.OpeningBook | None:
+        """
+        Return the opening book, opening it on first use, or None if there is no usable book file
+        """
+        if self.book is None and self.book_path is not None:
+            try:
+                self.book = book.OpeningBook(self.book_path)
+            except (OSError, ValueError):
+                self.book_path = None
+        return self.book
+
+    def get_book_move(self, chessboard: chessboard.Chessboard) -> gl.Move | None:
+        """
+        Return a move from the opening book for the position of the arg chessboard or None if it is not in the book
+        """
+        opening_book = self.get_book()
+        if opening_book is None:
+            return None
+        move = opening_book.choose_move(chessboard.board_state, self.rng)
+        return None if move is None else chessboard.board_state.decode_move(move)
+
+    def start_pondering(self, chessboard: chessboard.Chessboard, move: gl.Move):
+        """
+        Start searching on the opponent's time once the arg move is handed out to be played on the arg chessboard.
+        The expected reply is the best move stored in the transposition table for the position after the move - if there is one,
+        the position after the reply is searched as if it was the AI's turn already, otherwise the whole position after the move
+        is searched for the opponent, which still fills the transposition table for the next search.
+        The ponder search runs without a time budget until the opponent moves. There is no pondering while the opponent
+        is still in the opening book, as the reply to any book move is taken from the book as well
+        """
+        if not self.ponder or not self.running or chessboard.ended or self.ponder_thread is not None:
+            return
+        board_state = deepcopy(chessboard.board_state)
+        board_state.make_move(board_state.encode_move(move))
+        to_move = 1 - chessboard.to_move
+        moves = board_state.get_all_legal_moves(to_move)
+        if len(moves) == 0:
+            return
+        opening_book = self.get_book()
+        if opening_book is not None and opening_book.contains(board_state.zobrist_key):
+            return
+        self.ponder_key = None
+        expected_reply = self.transposition_table.probe_move(board_state.zobrist_key)
+        if expected_reply is not None and expected_reply in moves:
+            board_state.make_move(expected_reply)
+            to_move = 1 - to_move
+            if not board_state.has_legal_moves(to_move):
+                return
+            self.ponder_key = board_state.zobrist_key
+        self.ponder_hit = False
+        self.ponder_result = None
+        self.stop_token.clear()
+        self.ponder_thread = threading.Thread(target = self.execute_ponder, args = (board_state, to_move), daemon = True)
+        self.ponder_thread.start()
+
+    def execute_ponder(self, board_state: gl.BoardState, to_move: int):
+        """
+        Runs iterative deepening on the pondered position in argument, stores the resulting move in the packed integer form
+        """
+        _, self.ponder_result = self.iterative_deepening(board_state, to_move)
+
+    def resolve_ponder(self, chessboard: chessboard.Chessboard, chessclock: ChessClock = None):
+        """
+        Decide what happens to the running ponder search now that the AI is on move on the arg chessboard.
+        On a ponder hit - the opponent played the expected reply - the ponder search is given the time budget of the move,
+        counting the time already spent pondering, and its result becomes the calculated move once it finishes.
+        On a miss the ponder search is stopped and discarded, only the transposition table entries it left are kept
+        """
+        if not self.ponder_hit:
+            if self.ponder_key is not None and chessboard.board_state.zobrist_key == self.ponder_key:
+                self.ponder_hit = True
+                time_budget = self.allocate_time(chessclock, chessboard.to_move)
+                self.time_budget = time_budget
+                self.deadline = max(self.search_start + time_budget / 1000, time.time() + cf.MIN_MOVE_TIME_MS / 1000)
+            else:
+                self.stop_pondering()
+                return
+        if self.ponder_thread.is_alive():
+            return
+        self.ponder_thread = None
+        if self.ponder_result is not None:
+            self.calculated_move = chessboard.board_state.decode_move(self.ponder_result)
+
+    def stop_pondering(self, timeout: float | None = cf.SEARCH_STOP_TIMEOUT_MS):
         """
-        If no move is currently being calculated, calls the execute minimax with pruning function
+        Stop the running ponder search and wait at most the arg timeout in milliseconds for it to finish, its result is discarded.
+        A ponder search which has not finished in time is kept, so no new search is started until it does
         """
-        if self.running_thread is not None:
+        if self.ponder_thread is None:
             return
-        self.running_thread = threading.Thread(target = self.execute_minimax_with_pruning, args = (chessboard,))
-        self.running_thread.start()
\ No newline at end of file
+        self.stop_token.set()
+        self.ponder_thread.join(None if timeout is None else timeout / 1000)
+        if self.ponder_thread.is_alive():
+            return
+        self.ponder_thread = None
+        self.ponder_result = None
+
+
+_worker_ai = None
+_worker_stop_event = None
+_worker_table_size_mb = cf.TRANSPOSITION_TABLE_SIZE_MB
+
+def init_worker(stop_event, table_size_mb: float):
+    """
+    Initializer of the worker processes of the parallel search, stores the stop event shared with the main process
+    and the transposition table budget of the worker in megabytes
+    """
+    global _worker_stop_event, _worker_table_size_mb
+    _worker_stop_event = stop_event
+    _worker_table_size_mb = table_size_mb
+
+def start_worker():
+    """
+    Startup task of the worker processes of the parallel search, does nothing - submitting it spawns the process
+    """
+
+def search_root_moves(fen: str, moves: bytes, deadline: float, max_depth: int, max_nodes: int | None) -> tuple[list[tuple[int, int, int]], int]:
+    """
+    Entry point of the worker processes of the parallel search. Searches the root moves given as the bytes of a packed move array
+    in the position given by the fen string with iterative deepening until the deadline in seconds since the epoch.
+    Every worker process keeps a single AI object, so its transposition table and history table are reused between moves.
+    Returns the (depth, evaluation, best move) results of all completed iterations and the number of searched nodes
+    """
+    global _worker_ai
+    if _worker_ai is None or _worker_ai.max_depth != max_depth:
+        _worker_ai = AI(max_depth, max_nodes, workers = 1, ponder = False, book_path = None, table_size_mb = _worker_table_size_mb)
+        _worker_ai.stop_event = _worker_stop_event
+    _worker_ai.max_nodes = max_nodes
+    root_moves = array('H')
+    root_moves.frombytes(moves)
+    board_state = gl.BoardState(fen)
+    time_budget = max((deadline - time.time()) * 1000, cf.MIN_MOVE_TIME_MS)
+    _worker_ai.iterative_deepening(board_state, board_state.to_move, time_budget, root_moves)
+    return _worker_ai.iteration_results, _worker_ai.nodes
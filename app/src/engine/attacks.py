@@ -0,0 +1,213 @@
+"""
+Module implementing precomputed attack tables used by the move generators.
+Leaping pieces (knights, kings, pawn captures) use plain 64-entry tables, sliding pieces
+use magic bitboards - the relevant occupancy of a square is multiplied by a magic number and
+the top bits of the product index a per-square table of attack sets
+"""
+
+from app.src.engine import bitboard
+from app.src.engine.bitboard import MASK_64
+
+
+def _leaper_attacks(idx: int, offsets: list[tuple[int, int]]) -> int:
+    """
+    Return a bitboard of all squares reachable from the arg square index by a single jump
+    of any of the (file, rank) offsets in argument, ignoring jumps leading off the board
+    """
+    file = idx % 8
+    rank = idx // 8
+    res = 0
+    for file_offset, rank_offset in offsets:
+        dst_file = file + file_offset
+        dst_rank = rank + rank_offset
+        if 0 <= dst_file < 8 and 0 <= dst_rank < 8:
+            res |= 1 << (dst_file + dst_rank * 8)
+    return res
+
+
+KNIGHT_OFFSETS = [(1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)]
+KING_OFFSETS = [(0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1), (-1, 0), (-1, 1)]
+WHITE_PAWN_CAPTURE_OFFSETS = [(-1, 1), (1, 1)]
+BLACK_PAWN_CAPTURE_OFFSETS = [(-1, -1), (1, -1)]
+
+KNIGHT_ATTACKS = [_leaper_attacks(idx, KNIGHT_OFFSETS) for idx in range(64)]
+KING_ATTACKS = [_leaper_attacks(idx, KING_OFFSETS) for idx in range(64)]
+PAWN_ATTACKS = [
+    [_leaper_attacks(idx, WHITE_PAWN_CAPTURE_OFFSETS) for idx in range(64)],
+    [_leaper_attacks(idx, BLACK_PAWN_CAPTURE_OFFSETS) for idx in range(64)]
+]
+
+
+# (index delta, mask of the destination squares that cannot be reached by wrapping around the board edge)
+KNIGHT_SHIFTS = [
+    (17, ~bitboard.FILE_A), (15, ~bitboard.FILE_H), (10, ~(bitboard.FILE_A | bitboard.FILE_B)), (6, ~(bitboard.FILE_G | bitboard.FILE_H)),
+    (-6, ~(bitboard.FILE_A | bitboard.FILE_B)), (-10, ~(bitboard.FILE_G | bitboard.FILE_H)), (-15, ~bitboard.FILE_A), (-17, ~bitboard.FILE_H)
+]
+PAWN_CAPTURE_SHIFTS = [
+    [(7, ~bitboard.FILE_H), (9, ~bitboard.FILE_A)],
+    [(-9, ~bitboard.FILE_H), (-7, ~bitboard.FILE_A)]
+]
+PAWN_PUSH_SHIFTS = [8, -8]
+
+
+def knight_attacks(knights: int) -> int:
+    """
+    Return a bitboard of all squares attacked by the set of knights in argument, computed set-wise
+    by shifting the whole bitboard once per jump direction
+    """
+    res = 0
+    for delta, mask in KNIGHT_SHIFTS:
+        res |= bitboard.shift(knights, delta) & mask
+    return res
+
+def pawn_attacks(pawns: int, color: int) -> int:
+    """
+    Return a bitboard of all squares attacked by the set of pawns of the arg color in argument, computed set-wise.
+    Only diagonal captures are attacks, pawn pushes are not included
+    """
+    (left_delta, left_mask), (right_delta, right_mask) = PAWN_CAPTURE_SHIFTS[color]
+    return (bitboard.shift(pawns, left_delta) & left_mask) | (bitboard.shift(pawns, right_delta) & right_mask)
+
+
+def _init_between_table() -> list[list[int]]:
+    """
+    Return a 64x64 table holding, for every pair of square indices lying on a common rank, file or diagonal,
+    a bitboard of the squares strictly between them. Pairs of unaligned squares map to an empty bitboard
+    """
+    table = [[0] * 64 for _ in range(64)]
+    for idx in range(64):
+        for file_offset, rank_offset in KING_OFFSETS:
+            file = idx % 8 + file_offset
+            rank = idx // 8 + rank_offset
+            between = 0
+            while 0 <= file < 8 and 0 <= rank < 8:
+                table[idx][file + rank * 8] = between
+                between |= 1 << (file + rank * 8)
+                file += file_offset
+                rank += rank_offset
+    return table
+
+
+BETWEEN = _init_between_table()
+
+
+ROOK_DIRECTIONS = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+BISHOP_DIRECTIONS = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+
+ROOK_MAGICS = [
+    0x128012c0008000e0, 0x0240002000401001, 0x4100200041001008, 0x8280100008018004,
+    0x2080080002040080, 0x1300010004008208, 0x04000208a9101408, 0x020000204a018f04,
+    0x1080800040008020, 0x0000c01000402001, 0x0080808010002000, 0x0408800800801000,
+    0x0010800801040080, 0x4804800400804200, 0x0304800d00800200, 0x010200040081006a,
+    0x8280044020084000, 0x042000c010004021, 0x2010002004080020, 0x0040210010000900,
+    0x0008004004020041, 0x0004008080040200, 0x1c20040070610208, 0x1020a20000508104,
+    0x0100c00380008120, 0x4001200280400080, 0x0200100080200080, 0x0000401200082200,
+    0xc02c080080040080, 0x0840040080020080, 0x2102004040800100, 0x0042079a00004104,
+    0x0000400424800280, 0x4820100020400040, 0x5010002000801880, 0x9061080081801002,
+    0x208a050011000800, 0x000200080e003094, 0xa010018204003008, 0x2000288042001401,
+    0x400181c000228000, 0x0200402010004000, 0x8388928600420021, 0x400021001001000a,
+    0x2100080011010004, 0x1002020004008080, 0x0802000804020001, 0x88004410408a0001,
+    0x010508c030800100, 0x4000400080310100, 0x0030200010048080, 0x2000800800100080,
+    0x0100040008008080, 0x0022000204008080, 0x0108020170284400, 0x1001010084004200,
+    0x0004890141902202, 0x0100881100220042, 0x0100102001000841, 0x4408050020081001,
+    0x0002008884201002, 0x2002000490410802, 0x0020014800900204, 0x0100082081044402
+]
+
+BISHOP_MAGICS = [
+    0x4140421084010140, 0x0020821081011004, 0x22900501d1128046, 0x1208084100200406,
+    0x04011041800a0000, 0x0032080208180000, 0x01020090080a0420, 0x4000154804042040,
+    0x0420400244440091, 0x0204101002004051, 0x2b000800a1020044, 0x0000880861040400,
+    0x0000011041606002, 0x0082082838080442, 0x0040140088041020, 0x0010020602014498,
+    0x1426441084080820, 0x0010002001220080, 0x1402004044004080, 0x008080c802084000,
+    0x00c2000402a20280, 0x2006402608200422, 0x40040404a6011002, 0xc082210884980804,
+    0x0420200404091208, 0x1010284e24080080, 0x8804100002082142, 0x1004010020200880,
+    0x000100108d004008, 0x8000920005012081, 0x04010521144c1000, 0xa016052040809800,
+    0x0004300400410494, 0x00040108002022c0, 0x8101024121080800, 0x400b020080480080,
+    0x0040004100081100, 0x8201010200040a00, 0x4004808200140100, 0x0801020082002420,
+    0x0211100804202000, 0x40004208c4006000, 0x0002001048020420, 0x0010802011021808,
+    0x0800020202008410, 0x411010300c409020, 0x082008010050c108, 0x060208a122000301,
+    0x4202080208041000, 0x4800290808041000, 0xa800004208040422, 0x0000200020880040,
+    0xe090001202020a00, 0x000010602101080c, 0x4808b04448044000, 0x00901220c1020880,
+    0x4011018804210c80, 0x001c01040201050a, 0x180800004044106c, 0x202e001001048800,
+    0x0048080071020220, 0x0800608590041840, 0x0000089004008400, 0xa004300a00640080
+]
+
+
+def _sliding_attacks(idx: int, occupancy: int, directions: list[tuple[int, int]]) -> int:
+    """
+    Return a bitboard of all squares attacked from the arg square index by a piece sliding in the
+    (file, rank) directions in argument, each ray stopping at the first occupied square
+    """
+    res = 0
+    for file_offset, rank_offset in directions:
+        file = idx % 8 + file_offset
+        rank = idx // 8 + rank_offset
+        while 0 <= file < 8 and 0 <= rank < 8:
+            square = 1 << (file + rank * 8)
+            res |= square
+            if occupancy & square:
+                break
+            file += file_offset
+            rank += rank_offset
+    return res
+
+def _relevant_occupancy_mask(idx: int, directions: list[tuple[int, int]]) -> int:
+    """
+    Return a bitboard of the squares whose occupancy can affect the sliding attacks from the arg square index,
+    the last square of every ray is left out as it is attacked regardless of its occupancy
+    """
+    res = 0
+    for file_offset, rank_offset in directions:
+        file = idx % 8 + file_offset
+        rank = idx // 8 + rank_offset
+        while 0 <= file + file_offset < 8 and 0 <= rank + rank_offset < 8:
+            res |= 1 << (file + rank * 8)
+            file += file_offset
+            rank += rank_offset
+    return res
+
+def _init_magic_tables(directions: list[tuple[int, int]], magics: list[int]) -> tuple[list[int], list[int], list[list[int]]]:
+    """
+    Return relevant occupancy masks, index shifts and attack tables of a sliding piece for every square.
+    Every subset of the relevant occupancy mask is enumerated and its attack set is stored under its magic index
+    """
+    masks = []
+    shifts = []
+    tables = []
+    for idx in range(64):
+        mask = _relevant_occupancy_mask(idx, directions)
+        shift = 64 - mask.bit_count()
+        table = [0] * (1 << mask.bit_count())
+        occupancy = 0
+        while True:
+            table[((occupancy * magics[idx]) & MASK_64) >> shift] = _sliding_attacks(idx, occupancy, directions)
+            occupancy = (occupancy - mask) & mask
+            if occupancy == 0:
+                break
+        masks.append(mask)
+        shifts.append(shift)
+        tables.append(table)
+    return masks, shifts, tables
+
+
+ROOK_MASKS, ROOK_SHIFTS, ROOK_TABLES = _init_magic_tables(ROOK_DIRECTIONS, ROOK_MAGICS)
+BISHOP_MASKS, BISHOP_SHIFTS, BISHOP_TABLES = _init_magic_tables(BISHOP_DIRECTIONS, BISHOP_MAGICS)
+
+
+def rook_attacks(idx: int, occupancy: int) -> int:
+    """
+    Return a bitboard of all squares attacked by a rook on the arg square index given the occupancy in argument
+    """
+    return ROOK_TABLES[idx][(((occupancy & ROOK_MASKS[idx]) * ROOK_MAGICS[idx]) & MASK_64) >> ROOK_SHIFTS[idx]]
+
+def bishop_attacks(idx: int, occupancy: int) -> int:
+    """
+    Return a bitboard of all squares attacked by a bishop on the arg square index given the occupancy in argument
+    """
+    return BISHOP_TABLES[idx][(((occupancy & BISHOP_MASKS[idx]) * BISHOP_MAGICS[idx]) & MASK_64) >> BISHOP_SHIFTS[idx]]
+
+def queen_attacks(idx: int, occupancy: int) -> int:
+    """
+    Return a bitboard of all squares attacked by a queen on the arg square index given the occupancy in argument
+    """
+    return rook_attacks(idx, occupancy) | bishop_attacks(idx, occupancy)
@@ -0,0 +1,47 @@
+"""
+Module implementing helper functions for bitboards. A bitboard is a native python int holding 64 bits,
+bit i is set to 1 if the square with index i (a1 = 0, b1 = 1, ..., h8 = 63) is part of the set.
+Python ints are unbounded, so results of shifts and negations are masked back to 64 bits where needed
+"""
+
+MASK_64 = 0xffffffffffffffff
+
+FILE_A = 0x0101010101010101
+FILE_B = 0x0202020202020202
+FILE_G = 0x4040404040404040
+FILE_H = 0x8080808080808080
+RANK_1 = 0x00000000000000ff
+RANK_2 = 0x000000000000ff00
+RANK_3 = 0x0000000000ff0000
+RANK_6 = 0x0000ff0000000000
+RANK_7 = 0x00ff000000000000
+RANK_8 = 0xff00000000000000
+PROMOTION_RANKS = RANK_1 | RANK_8
+
+
+def shift(bb: int, delta: int) -> int:
+    """
+    Return the arg bitboard with every bit moved by delta indices - towards h8 if delta is positive, towards a1 if negative.
+    Bits shifted past either end of the board are dropped, wrapping across files has to be masked out by the caller
+    """
+    if delta >= 0:
+        return (bb << delta) & MASK_64
+    return bb >> -delta
+
+def iterate_indices(bb: int):
+    """
+    Generate indices of all bits set to 1 in the arg bitboard, from the least significant one
+    """
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
+
+def iterate_squares(bb: int):
+    """
+    Generate single-bit bitboards for all bits set to 1 in the arg bitboard, from the least significant one
+    """
+    while bb:
+        low = bb & -bb
+        yield low
+        bb ^= low
@@ -0,0 +1,237 @@
+"""
+Module implementing the opening book.
+A book is a binary file of fixed-size (zobrist key, move, weight) records sorted by key. The file is memory-mapped and the records
+of a position are found by binary search over it, so opening a book costs the same regardless of its size and nothing is parsed
+or loaded into memory up front. Moves are stored in the packed integer form, the weight of a move is the number of times it was
+played in the games the book was compiled from. Keys are the zobrist keys of the engine, so books are only valid for this engine.
+
+Books are compiled from PGN files by the builder in this module.
+
+Usage:
+    python -m app.src.engine.book --output assets/book.bin [--max-ply N] [--min-weight N] games.pgn [more.pgn ...]
+"""
+
+import argparse
+import mmap
+import os
+import random
+import re
+import struct
+import sys
+from app import config as cf
+from app.src.engine import game_logic as gl
+
+# zobrist key (8 bytes), packed move (2 bytes) and weight (2 bytes), little-endian
+RECORD = struct.Struct('<QHH')
+RECORD_SIZE = RECORD.size
+MAX_WEIGHT = 0xffff
+
+
+class OpeningBook():
+    """
+    Class representing a memory-mapped opening book file
+    """
+    def __init__(self, path: str):
+        """
+        OpeningBook takes the path of a book file as a constructor argument, the file is mapped but not read
+        """
+        self.path = path
+        self.file = open(path, 'rb')
+        size = os.fstat(self.file.fileno()).st_size
+        if size % RECORD_SIZE != 0:
+            self.file.close()
+            raise ValueError(f'{path} is not an opening book file')
+        self.size = size // RECORD_SIZE
+        self.data = mmap.mmap(self.file.fileno(), 0, access = mmap.ACCESS_READ) if size != 0 else b''
+
+    def close(self):
+        """
+        Unmap and close the book file
+        """
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.data = b''
+        self.size = 0
+        self.file.close()
+
+    def key_at(self, i: int) -> int:
+        """
+        Return the zobrist key of the arg-th record
+        """
+        return RECORD.unpack_from(self.data, i * RECORD_SIZE)[0]
+
+    def probe(self, key: int) -> list[tuple[int, int]]:
+        """
+        Return the (move, weight) entries stored for the arg zobrist key, moves in the packed integer form.
+        The first record of the key is found by binary search, the records of a key are stored next to each other
+        """
+        low = 0
+        high = self.size
+        while low < high:
+            mid = (low + high) // 2
+            if self.key_at(mid) < key:
+                low = mid + 1
+            else:
+                high = mid
+        res = []
+        for i in range(low, self.size):
+            record_key, move, weight = RECORD.unpack_from(self.data, i * RECORD_SIZE)
+            if record_key != key:
+                break
+            res.append((move, weight))
+        return res
+
+    def contains(self, key: int) -> bool:
+        """
+        Return true if the book has any move for the arg zobrist key
+        """
+        return len(self.probe(key)) != 0
+
+    def choose_move(self, board_state: gl.BoardState, rng: random.Random = None) -> int | None:
+        """
+        Return a book move for the player on move in the arg board state in the packed integer form, or None if the position
+        is not in the book. Moves are picked at random with probability proportional to their weight, only legal moves
+        are considered so a key collision cannot produce an illegal move
+        """
+        entries = self.probe(board_state.zobrist_key)
+        if len(entries) == 0:
+            return None
+        legal_moves = board_state.get_all_legal_moves(board_state.to_move)
+        entries = [(move, weight) for move, weight in entries if move in legal_moves and weight > 0]
+        if len(entries) == 0:
+            return None
+        if rng is None:
+            rng = random
+        return rng.choices([move for move, _ in entries], [weight for _, weight in entries])[0]
+
+
+SAN_PATTERN = re.compile(r'^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?$')
+
+def parse_san(board_state: gl.BoardState, san: str) -> int:
+    """
+    Return the legal move described by the arg move in standard algebraic notation in the arg board state
+    in the packed integer form. Check, mate and annotation symbols are ignored, both O-O and 0-0 castling notations are accepted.
+    Raises ValueError if the move is malformed, illegal or ambiguous
+    """
+    legal_moves = board_state.get_all_legal_moves(board_state.to_move)
+    san = san.rstrip('+#!?')
+    if san in ('O-O', '0-0', 'O-O-O', '0-0-0'):
+        king_dst = (6 if len(san) == 3 else 2) + (0 if board_state.to_move == 0 else 56)
+        for move in legal_moves:
+            if gl.move_flag(move) == gl.MOVE_CASTLING and gl.move_dst(move) == king_dst:
+                return move
+        raise ValueError(f'illegal move {san}')
+    match = SAN_PATTERN.match(san)
+    if match is None:
+        raise ValueError(f'malformed move {san}')
+    piece, src_file, src_rank, dst, promotion = match.groups()
+    piece = 'p' if piece is None else piece.lower()
+    dst_idx = gl.pos_to_idx(dst)
+    candidates = []
+    for move in legal_moves:
+        src_idx = gl.move_src(move)
+        if (gl.move_dst(move) != dst_idx or board_state.mailbox[src_idx][1] != piece or gl.move_flag(move) == gl.MOVE_CASTLING or
+            gl.move_promotion_type(move) != (None if promotion is None else promotion.lower())):
+            continue
+        if src_file is not None and 'abcdefgh'[src_idx % 8] != src_file:
+            continue
+        if src_rank is not None and str(src_idx // 8 + 1) != src_rank:
+            continue
+        candidates.append(move)
+    if len(candidates) != 1:
+        raise ValueError(f'{"illegal" if len(candidates) == 0 else "ambiguous"} move {san}')
+    return candidates[0]
+
+
+TAG_PATTERN = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+COMMENT_PATTERN = re.compile(r'\{[^}]*\}|;[^\n]*')
+TOKEN_PATTERN = re.compile(r'\[\s*\w+\s+"(?:[^"\\]|\\.)*"\s*\]|\(|\)|[^\s()]+')
+MOVE_NUMBER_PATTERN = re.compile(r'^\d+\.+')
+RESULTS = ('1-0', '0-1', '1/2-1/2', '*')
+
+def read_pgn_games(text: str):
+    """
+    Generator yielding a (fen, list of moves in standard algebraic notation) tuple for every game of the arg PGN text.
+    The fen is the starting position of the game, taken from its FEN tag if it has one.
+    Comments, variations, move numbers and numeric annotation glyphs are skipped
+    """
+    fen = cf.STARTING_POSITION_FEN
+    moves = []
+    variation_depth = 0
+    for token in TOKEN_PATTERN.findall(COMMENT_PATTERN.sub(' ', text)):
+        if token.startswith('['):
+            if len(moves) != 0:
+                yield fen, moves
+                fen = cf.STARTING_POSITION_FEN
+                moves = []
+            name, value = TAG_PATTERN.match(token).groups()
+            if name == 'FEN':
+                fen = value
+            continue
+        if token == '(':
+            variation_depth += 1
+            continue
+        if token == ')':
+            variation_depth = max(variation_depth - 1, 0)
+            continue
+        if variation_depth > 0 or token.startswith('$'):
+            continue
+        if token in RESULTS:
+            yield fen, moves
+            fen = cf.STARTING_POSITION_FEN
+            moves = []
+            continue
+        token = MOVE_NUMBER_PATTERN.sub('', token)
+        if token != '':
+            moves.append(token)
+    if len(moves) != 0:
+        yield fen, moves
+
+
+def build_book(pgn_paths: list[str], output_path: str, max_ply: int = cf.BOOK_MAX_PLY, min_weight: int = 1) -> tuple[int, int]:
+    """
+    Compile an opening book from the games of the PGN files in argument and write it to the output path.
+    The first max ply moves of every game are counted, moves played fewer than min weight times are left out.
+    A game with an unreadable move contributes only the moves before it.
+    Returns the number of games read and the number of records written
+    """
+    counts = {}
+    game_count = 0
+    for path in pgn_paths:
+        with open(path, encoding = 'utf-8', errors = 'replace') as file:
+            text = file.read()
+        for fen, moves in read_pgn_games(text):
+            game_count += 1
+            board_state = gl.BoardState(fen)
+            for san in moves[:max_ply]:
+                try:
+                    move = parse_san(board_state, san)
+                except ValueError:
+                    break
+                entry = (board_state.zobrist_key, move)
+                counts[entry] = counts.get(entry, 0) + 1
+                board_state.make_move(move)
+    records = sorted((key, move, min(weight, MAX_WEIGHT)) for (key, move), weight in counts.items() if weight >= min_weight)
+    with open(output_path, 'wb') as file:
+        for record in records:
+            file.write(RECORD.pack(*record))
+    return game_count, len(records)
+
+
+def main(argv: list[str] = None) -> int:
+    """
+    Command line entry point
+    """
+    parser = argparse.ArgumentParser(description = 'Opening book compiler')
+    parser.add_argument('pgn', nargs = '+', help = 'PGN files to compile the book from')
+    parser.add_argument('--output', default = cf.OPENING_BOOK_PATH, help = 'path of the book file to write')
+    parser.add_argument('--max-ply', type = int, default = cf.BOOK_MAX_PLY, help = 'number of moves of every game to include')
+    parser.add_argument('--min-weight', type = int, default = 1, help = 'minimum number of times a move has to be played to be included')
+    args = parser.parse_args(argv)
+    game_count, record_count = build_book(args.pgn, args.output, args.max_ply, args.min_weight)
+    print(f'{game_count} games, {record_count} book moves written to {args.output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,8 +3,7 @@ Module implementing the chessboard class
 """
 from app.src.engine import game_logic as gl
 from app import config as cf
-from copy import deepcopy
-import numpy as np
+from array import array
 
 
 class Chessboard():
@@ -27,6 +26,8 @@ class Chessboard():
         self.full_move_count = int(fen_parts[5])
         self.ended = False
         self.reached_positions = {}
+        self.repetition_count = 0
+        self.legal_moves = None
         self.last_move_played = None
         self.no_legal_moves = False
         self.timeout = False
@@ -38,25 +39,21 @@ class Chessboard():
         """
         if move.src & self.board_state.occupied(self.to_move) == 0:
             return False
-        board_state_copy = deepcopy(self.board_state)
-        return board_state_copy.push_move(move) and not board_state_copy.king_in_check(self.to_move)
+        return self.board_state.encode_move(move) in self.get_legal_move_codes()
     
-    def get_legal_moves(self, pos: np.uint64, return_as_bitboard: bool = False) -> list[gl.Move] | np.uint64: 
+    def get_legal_moves(self, pos: int, return_as_bitboard: bool = False) -> list[gl.Move] | int: 
         """
         Return list of all legal moves from the given position or 
         bitboard of all legal move destinations from the given position
         """
         if pos & self.board_state.occupied(self.to_move) == 0:
             if return_as_bitboard:
-                return np.uint64(0)
+                return 0
             return []
-        pseudo_legal_moves = self.board_state.pos_moves(pos)
-        res = []
-        for move in pseudo_legal_moves:
-            if self.validate_move(move):
-                res.append(move)
+        src_idx = gl.bb_to_idx(pos)
+        res = [self.board_state.decode_move(move) for move in self.get_legal_move_codes() if gl.move_src(move) == src_idx]
         if return_as_bitboard:
-            bb = np.uint64(0)
+            bb = 0
             for move in res:
                 bb |= move.dst
             return bb
@@ -66,18 +63,33 @@ class Chessboard():
         """
         Return a list of all legal moves that can be played by the player on move
         """
-        res = []
-        for pos in gl.generate_positions(self.board_state.occupied(self.to_move)):
-            res.extend(self.get_legal_moves(pos))
-        return res
+        return [self.board_state.decode_move(move) for move in self.get_legal_move_codes()]
+
+    def get_legal_move_codes(self) -> array:
+        """
+        Return an array of all legal moves of the player on move in the packed integer form.
+        The array is generated once per position and reused until the next move is executed
+        """
+        if self.legal_moves is None:
+            self.legal_moves = self.board_state.get_all_legal_moves(self.to_move)
+        return self.legal_moves
+
+    def has_legal_moves(self) -> bool:
+        """
+        Return true if the player on move has at least one legal move else false,
+        stopping at the first legal move found unless the full list is already cached
+        """
+        if self.legal_moves is not None:
+            return len(self.legal_moves) != 0
+        return self.board_state.has_legal_moves(self.to_move)
     
     def get_position_evaluation(self) -> int:
         """
-        Return numerical evaluation of the current position
+        Return numerical evaluation of the current position in centipawns
         """
         result = self.get_result()
         if result == -1:
-            return self.board_state.get_material_count(0) - self.board_state.get_material_count(1)
+            return self.board_state.get_evaluation()
         if result == cf.WHITE_VICTORY_BY_CHECKMATE:
             return cf.INF
         if result == cf.BLACK_VICTORY_BY_CHECKMATE:
@@ -91,16 +103,15 @@ class Chessboard():
         """
         if self.timeout: 
             return True
-        if self.get_all_legal_moves() == []:
+        if not self.has_legal_moves():
             self.no_legal_moves = True
             return True
         if self.half_move_count >= 100:
             return True
         if self.board_state.has_insufficient_material(0) and self.board_state.has_insufficient_material(1):
             return True
-        for count in self.reached_positions.values():
-            if count >= 3:
-                return True
+        if self.repetition_count >= 3:
+            return True
         return False        
 
     def get_result(self) -> int:
@@ -126,9 +137,8 @@ class Chessboard():
             return cf.DRAW_BY_STALEMATE
         if self.board_state.has_insufficient_material(0) and self.board_state.has_insufficient_material(1):
             return cf.DRAW_BY_INSUFFICIENT_MATERIAL
-        for count in self.reached_positions.values():
-            if count >= 3:
-                return cf.DRAW_BY_THREEFOLD_REPETITION
+        if self.repetition_count >= 3:
+            return cf.DRAW_BY_THREEFOLD_REPETITION
         return cf.DRAW_BY_50_MOVE_RULE
     
     def execute_move(self, move: gl.Move, validate: bool = False) -> bool:
@@ -147,23 +157,25 @@ class Chessboard():
         else:
             self.half_move_count += 1
         self.board_state.push_move(move)
+        self.legal_moves = None
         position_hash = self.board_state.get_position_hash(self.to_move)
-        self.reached_positions[position_hash] = self.reached_positions.get(position_hash, 0) + 1
+        self.repetition_count = self.reached_positions.get(position_hash, 0) + 1
+        self.reached_positions[position_hash] = self.repetition_count
         self.ended = self.has_ended()
         self.last_move_played = move
         return True
         
-    def get_piece_at_pos(self, pos: np.uint64) -> str | None:
+    def get_piece_at_pos(self, pos: int) -> str | None:
         """
         Return type and color of piece at the arg pos
         """
         return self.board_state.get_piece_type(pos)
         
-    def is_promotion(self, src: np.uint64, dst: np.uint64) -> bool:
+    def is_promotion(self, src: int, dst: int) -> bool:
         """
         Return true if the move from the arg source to the arg destination is a promotion else false
         """
-        return self.get_piece_at_pos(src) in ['wp', 'bp'] and dst & np.uint64(0xff000000000000ff) != 0
+        return self.get_piece_at_pos(src) in ['wp', 'bp'] and dst & 0xff000000000000ff != 0
     
     def raise_timeout(self):
         """
@@ -3,19 +3,118 @@ Module implementing all necessary backend logic for a chess engine
 """
 
 from app import config as cf
-import numpy as np
+from app.src.engine import attacks, bitboard, evaluation, zobrist
+from array import array
 import random
 
+MOVE_NORMAL = 0
+MOVE_PROMOTION = 1
+MOVE_EN_PASSANT = 2
+MOVE_CASTLING = 3
+
+PROMOTION_TYPES = ['n', 'b', 'r', 'q']
+PROMOTION_CODES = {'n' : 0, 'b' : 1, 'r' : 2, 'q' : 3}
+PROMOTION_ORDER = ['q', 'b', 'n', 'r']
+
+CASTLING_ROOK_SQUARES = {6 : (7, 5), 2 : (0, 3), 62 : (63, 61), 58 : (56, 59)}
+
+
+def encode_move(src_idx: int, dst_idx: int, promotion_type: str = None, flag: int = MOVE_NORMAL) -> int:
+    """
+    Pack a move into a 16-bit integer - bits 0-5 hold the source square index, bits 6-11 the destination 
+    square index, bits 12-13 the promotion piece type and bits 14-15 the move flag
+    """
+    promotion_code = 0 if promotion_type is None else PROMOTION_CODES[promotion_type]
+    return src_idx | dst_idx << 6 | promotion_code << 12 | flag << 14
+
+def move_src(move: int) -> int:
+    """
+    Return the source square index of the arg packed move
+    """
+    return move & 0x3f
+
+def move_dst(move: int) -> int:
+    """
+    Return the destination square index of the arg packed move
+    """
+    return (move >> 6) & 0x3f
+
+def move_flag(move: int) -> int:
+    """
+    Return the flag of the arg packed move
+    """
+    return move >> 14
+
+def move_promotion_type(move: int) -> str | None:
+    """
+    Return the promotion piece type of the arg packed move or None if it is not a promotion
+    """
+    if move >> 14 != MOVE_PROMOTION:
+        return None
+    return PROMOTION_TYPES[(move >> 12) & 3]
+
+def _append_shifted_moves(moves: array, targets: int, delta: int, promotions: bool = False) -> None:
+    """
+    Append packed moves to every destination in the targets bitboard from the source square delta indices behind it.
+    If promotions is True, destinations on the first or last rank are expanded into all four promotions
+    """
+    if promotions and targets & bitboard.PROMOTION_RANKS != 0:
+        for dst_idx in bitboard.iterate_indices(targets & bitboard.PROMOTION_RANKS):
+            for promotion_type in PROMOTION_ORDER:
+                moves.append(encode_move(dst_idx - delta, dst_idx, promotion_type, MOVE_PROMOTION))
+        targets &= ~bitboard.PROMOTION_RANKS
+    for dst_idx in bitboard.iterate_indices(targets):
+        moves.append(dst_idx - delta | dst_idx << 6)
+
+
 class Move:
     """
-    Basic data class representing a single chess move
+    Basic data class representing a single chess move. 
+    It wraps the packed 16-bit encoding used by the engine and stores the moving piece color and type alongside it
     """
-    def __init__(self, src: np.uint64, dst: np.uint64, type: str, color: str, promotion_type: str = None):
-        self.src = src
-        self.dst = dst
+    __slots__ = ('code', 'type', 'color')
+
+    def __init__(self, src: int, dst: int, type: str, color: str, promotion_type: str = None):
+        src_idx = bb_to_idx(src)
+        dst_idx = bb_to_idx(dst)
+        if promotion_type is not None:
+            flag = MOVE_PROMOTION
+        elif type == 'k' and abs(dst_idx - src_idx) == 2:
+            flag = MOVE_CASTLING
+        else:
+            flag = MOVE_NORMAL
+        self.code = encode_move(src_idx, dst_idx, promotion_type, flag)
         self.type = type
         self.color = color
-        self.promotion_type = promotion_type
+
+    @classmethod
+    def from_code(cls, code: int, piece_type: str) -> 'Move':
+        """
+        Create a move from its packed encoding and the color and type of the moving piece
+        """
+        move = cls.__new__(cls)
+        move.code = code
+        move.type = piece_type[1]
+        move.color = piece_type[0]
+        return move
+
+    @property
+    def src(self) -> int:
+        return idx_to_bb(self.code & 0x3f)
+
+    @property
+    def dst(self) -> int:
+        return idx_to_bb((self.code >> 6) & 0x3f)
+
+    @property
+    def promotion_type(self) -> str | None:
+        return move_promotion_type(self.code)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Move) and self.code == other.code
+
+    def __hash__(self) -> int:
+        return self.code
         
 
 class BoardState():
@@ -27,32 +126,43 @@ class BoardState():
         BoardState takes a valid fen string as a constructor argument
         """
         self.pieces = {
-            'wp' : np.uint64(0),
-            'wn' : np.uint64(0),
-            'wb' : np.uint64(0),
-            'wr' : np.uint64(0),
-            'wq' : np.uint64(0),
-            'wk' : np.uint64(0),
-            'bp' : np.uint64(0),
-            'bn' : np.uint64(0),
-            'bb' : np.uint64(0),
-            'br' : np.uint64(0),
-            'bq' : np.uint64(0),
-            'bk' : np.uint64(0),
+            'wp' : 0,
+            'wn' : 0,
+            'wb' : 0,
+            'wr' : 0,
+            'wq' : 0,
+            'wk' : 0,
+            'bp' : 0,
+            'bn' : 0,
+            'bb' : 0,
+            'br' : 0,
+            'bq' : 0,
+            'bk' : 0,
         }
 
-        self.en_passant_square = np.uint64(0)
+        self.en_passant_square = 0
         self.black_oo = False
         self.black_ooo = False
         self.white_oo = False
         self.white_ooo = False
+        self.to_move = 0
+        self.zobrist_key = 0
+        # the fields below are derived from the piece bitboards and kept up to date by the methods adding and deleting pieces
+        self.color_occupancy = [0, 0]
+        self.total_occupancy = 0
+        self.mailbox = [None] * 64
+        self.piece_counts = dict.fromkeys(self.pieces, 0)
+        self.material = [0, 0]
+        self.mg_score = 0
+        self.eg_score = 0
+        self.phase = 0
 
         self.init(fen)                
 
     def init(self, fen: str) -> None:
         """
-        Parse fen string and initialize piece positions, castling rights and 
-        the potential en passant target square accordingly
+        Parse fen string and initialize piece positions, occupancy bitboards, mailbox, piece counts, material totals,
+        piece-square table scores, player on move, castling rights, the potential en passant target square and the zobrist key accordingly
         """
         fen_parts = fen.split(' ')
         board_fen = fen_parts[0]
@@ -89,6 +199,22 @@ class BoardState():
                     case 'K':
                         self.pieces['wk'] |= pos
                 file += 1
+
+        self.color_occupancy = [
+            self.pieces['wp'] | self.pieces['wn'] | self.pieces['wb'] | self.pieces['wr'] | self.pieces['wq'] | self.pieces['wk'],
+            self.pieces['bp'] | self.pieces['bn'] | self.pieces['bb'] | self.pieces['br'] | self.pieces['bq'] | self.pieces['bk']
+        ]
+        self.total_occupancy = self.color_occupancy[0] | self.color_occupancy[1]
+        for type, positions in self.pieces.items():
+            for idx in bitboard.iterate_indices(positions):
+                self.mailbox[idx] = type
+                self.mg_score += evaluation.MG_SQUARE_VALUES[type][idx]
+                self.eg_score += evaluation.EG_SQUARE_VALUES[type][idx]
+            self.piece_counts[type] = positions.bit_count()
+            self.material[0 if type[0] == 'w' else 1] += self.piece_counts[type] * cf.PIECE_VALUES[type[1]]
+            self.phase += self.piece_counts[type] * evaluation.PHASE_WEIGHTS[type[1]]
+
+        self.to_move = 0 if fen_parts[1] == 'w' else 1
         
         for char in fen_parts[2]:
             match char:
@@ -105,311 +231,124 @@ class BoardState():
         
         if fen_parts[3] != '-':
             self.en_passant_square = idx_to_bb(pos_to_idx(fen_parts[3]))
+
+        self.zobrist_key = self.compute_zobrist_key()
         
         
-    def occupied(self, color: int = None) -> np.uint64:
+    def occupied(self, color: int = None) -> int:
         """
         Return a bitboard with bits set to 1 if the square with associated index is occupied,
-        if no argument is provided, by pieces of either color, else only pieces of the color in the argument 
+        if no argument is provided, by pieces of either color, else only pieces of the color in the argument
         """
         if color is None:
-            return (self.pieces['wp'] | self.pieces['wn'] | self.pieces['wb'] | self.pieces['wr'] |
-                    self.pieces['wq'] | self.pieces['wk'] | self.pieces['bp'] | self.pieces['bn'] |
-                    self.pieces['bb'] | self.pieces['br'] | self.pieces['bq'] | self.pieces['bk'])
-        elif color == 0:
-            return (self.pieces['wp'] | self.pieces['wn'] | self.pieces['wb'] | self.pieces['wr'] |
-                    self.pieces['wq'] | self.pieces['wk'])
-        else:
-            return (self.pieces['bp'] | self.pieces['bn'] | self.pieces['bb'] | self.pieces['br'] |
-                    self.pieces['bq'] | self.pieces['bk'])
+            return self.total_occupancy
+        return self.color_occupancy[color]
     
-    def pawn_moves(self, pos: np.uint64) -> np.uint64:
+    def pawn_moves(self, pos: int) -> int:
         """
         Return a bitboard with bits set to 1 for all possible pawn moves from the position in the argument
         """
         idx = bb_to_idx(pos)
-        res = np.uint64(0)
+        res = 0
         if pos & self.pieces['wp'] != 0:
-            res |= pos << np.uint64(8) & ~self.occupied()
-            if pos & np.uint64(0xff00) != 0 and res != 0:
-                res |= (pos << np.uint64(16)) & ~self.occupied()
-            if idx % 8 != 0:
-                res |= (pos << np.uint64(7)) & (self.occupied(1) | self.en_passant_square)
-            if idx % 8 != 7:
-                res |= (pos << np.uint64(9)) & (self.occupied(1) | self.en_passant_square)
+            res |= pos << 8 & ~self.occupied()
+            if pos & bitboard.RANK_2 != 0 and res != 0:
+                res |= (pos << 16) & ~self.occupied()
+            res |= attacks.PAWN_ATTACKS[0][idx] & (self.occupied(1) | self.en_passant_square)
             return res
-        res |= pos >> np.uint64(8) & ~self.occupied()
-        if pos & np.uint64(0xff000000000000) != 0 and res != 0:
-            res |= (pos >> np.uint64(16)) & ~self.occupied()
-        if idx % 8 != 0:
-            res |= (pos >> np.uint64(9)) & (self.occupied(0) | self.en_passant_square)
-        if idx % 8 != 7:
-            res |= (pos >> np.uint64(7)) & (self.occupied(0) | self.en_passant_square)
+        res |= pos >> 8 & ~self.occupied()
+        if pos & bitboard.RANK_7 != 0 and res != 0:
+            res |= (pos >> 16) & ~self.occupied()
+        res |= attacks.PAWN_ATTACKS[1][idx] & (self.occupied(0) | self.en_passant_square)
         return res
         
 
-    def bishop_moves(self, pos: np.uint64, queen: bool = False) -> np.uint64:
+    def bishop_moves(self, pos: int, queen: bool = False) -> int:
         """
         Return a bitboard with bits set to 1 for all possible bishop moves from the position in the argument
         """
         if (not queen and pos & self.pieces['wb'] != 0) or (queen and pos & self.pieces['wq'] != 0):
             friendly_color = 0
-            enemy_color = 1
         else:
             friendly_color = 1
-            enemy_color = 0
-        res = np.uint64(0)
-        idx = bb_to_idx(pos)
-        tmp_pos = pos
-        tmp_idx = idx
-        while True:
-            rank = tmp_idx // 8
-            file = tmp_idx % 8
-            if file == 7 or rank == 7:
-                break
-            tmp_idx += 9
-            tmp_pos = tmp_pos << np.uint64(9)
-            if self.occupied(friendly_color) & tmp_pos != 0:
-                break
-            if self.occupied(enemy_color) & tmp_pos != 0:
-                res |= tmp_pos
-                break
-            res |= tmp_pos
-        tmp_pos = pos
-        tmp_idx = idx
-        while True:
-            rank = tmp_idx // 8
-            file = tmp_idx % 8
-            if file == 7 or rank == 0:
-                break
-            tmp_idx -= 7
-            tmp_pos = tmp_pos >> np.uint64(7)
-            if self.occupied(friendly_color) & tmp_pos != 0:
-                break
-            if self.occupied(enemy_color) & tmp_pos != 0:
-                res |= tmp_pos
-                break
-            res |= tmp_pos    
-        tmp_pos = pos
-        tmp_idx = idx
-        while True:
-            rank = tmp_idx // 8
-            file = tmp_idx % 8
-            if file == 0 or rank == 7:
-                break
-            tmp_idx += 7
-            tmp_pos = tmp_pos << np.uint64(7)
-            if self.occupied(friendly_color) & tmp_pos != 0:
-                break
-            if self.occupied(enemy_color) & tmp_pos != 0:
-                res |= tmp_pos
-                break
-            res |= tmp_pos
-        tmp_pos = pos
-        tmp_idx = idx
-        while True:
-            rank = tmp_idx // 8
-            file = tmp_idx % 8
-            if file == 0 or rank == 0:
-                break
-            tmp_idx -= 9
-            tmp_pos = tmp_pos >> np.uint64(9)
-            if self.occupied(friendly_color) & tmp_pos != 0:
-                break
-            if self.occupied(enemy_color) & tmp_pos != 0:
-                res |= tmp_pos
-                break
-            res |= tmp_pos
-        return res
+        return attacks.bishop_attacks(bb_to_idx(pos), self.occupied()) & ~self.occupied(friendly_color)
 
-    def rook_moves(self, pos: np.uint64, queen: bool = False) -> np.uint64:
+    def rook_moves(self, pos: int, queen: bool = False) -> int:
         """
         Return a bitboard with bits set to 1 for all possible rook moves from the position in the argument
         """
         if (not queen and pos & self.pieces['wr'] != 0) or (queen and pos & self.pieces['wq'] != 0):
             friendly_color = 0
-            enemy_color = 1
         else:
             friendly_color = 1
-            enemy_color = 0
-        res = np.uint64(0)
-        idx = bb_to_idx(pos)
-        tmp_pos = pos
-        tmp_idx = idx
-        while True:
-            rank = tmp_idx // 8
-            if rank == 7:
-                break
-            tmp_idx += 8
-            tmp_pos = tmp_pos << np.uint64(8)
-            if self.occupied(friendly_color) & tmp_pos != 0:
-                break
-            if self.occupied(enemy_color) & tmp_pos != 0:
-                res |= tmp_pos
-                break
-            res |= tmp_pos
-        tmp_pos = pos
-        tmp_idx = idx
-        while True:
-            rank = tmp_idx // 8
-            if rank == 0:
-                break
-            tmp_idx -= 8
-            tmp_pos = tmp_pos >> np.uint64(8)
-            if self.occupied(friendly_color) & tmp_pos != 0:
-                break
-            if self.occupied(enemy_color) & tmp_pos != 0:
-                res |= tmp_pos
-                break
-            res |= tmp_pos
-        tmp_pos = pos
-        tmp_idx = idx
-        while True:
-            file = tmp_idx % 8
-            if file == 7:
-                break
-            tmp_idx += 1
-            tmp_pos = tmp_pos << np.uint64(1)
-            if self.occupied(friendly_color) & tmp_pos != 0:
-                break
-            if self.occupied(enemy_color) & tmp_pos != 0:
-                res |= tmp_pos
-                break
-            res |= tmp_pos
-        tmp_pos = pos
-        tmp_idx = idx
-        while True:
-            file = tmp_idx % 8
-            if file == 0:
-                break
-            tmp_idx -= 1
-            tmp_pos = tmp_pos >> np.uint64(1)
-            if self.occupied(friendly_color) & tmp_pos != 0:
-                break
-            if self.occupied(enemy_color) & tmp_pos != 0:
-                res |= tmp_pos
-                break
-            res |= tmp_pos        
-        return res
+        return attacks.rook_attacks(bb_to_idx(pos), self.occupied()) & ~self.occupied(friendly_color)
         
-    def queen_moves(self, pos: np.uint64) -> np.uint64:
+    def queen_moves(self, pos: int) -> int:
         """
         Return a bitboard with bits set to 1 for all possible queen moves from the position in the argument
         """
-        return self.rook_moves(pos, True) | self.bishop_moves(pos, True)
+        if pos & self.pieces['wq'] != 0:
+            friendly_color = 0
+        else:
+            friendly_color = 1
+        return attacks.queen_attacks(bb_to_idx(pos), self.occupied()) & ~self.occupied(friendly_color)
     
-    def knight_moves(self, pos: np.uint64) -> np.uint64:
+    def knight_moves(self, pos: int) -> int:
         """
         Return a bitboard with bits set to 1 for all possible knight moves from the position in the argument
         """
-        res = np.uint64(0)
         if pos & self.pieces['wn'] != 0:
             friendly_color = 0
         else:
             friendly_color = 1
-        
-        a_file = np.uint64(0x0101010101010101)
-        b_file = np.uint64(0x0202020202020202)
-        g_file = np.uint64(0x4040404040404040)
-        h_file = np.uint64(0x8080808080808080)
-        rank_1 = np.uint64(0x00000000000000ff)
-        rank_2 = np.uint64(0x000000000000ff00)
-        rank_7 = np.uint64(0x00ff000000000000)
-        rank_8 = np.uint64(0xff00000000000000)
-
-        occupied = self.occupied(friendly_color)
-
-        if pos & ~rank_7 & ~rank_8 & ~a_file != 0:
-            res |= pos << np.uint64(15) & ~occupied
-        if pos & ~rank_7 & ~rank_8 & ~h_file != 0:
-            res |= pos << np.uint64(17) & ~occupied
-        if pos & ~rank_8 & ~g_file & ~h_file != 0:
-            res |= pos << np.uint64(10) & ~occupied
-        if pos & ~rank_1 & ~g_file & ~h_file != 0:
-            res |= pos >> np.uint64(6) & ~occupied
-        if pos & ~rank_1 & ~rank_2 & ~h_file != 0:
-            res |= pos >> np.uint64(15) & ~occupied
-        if pos & ~rank_1 & ~rank_2 & ~a_file != 0:
-            res |= pos >> np.uint64(17) & ~occupied
-        if pos & ~rank_1 & ~a_file & ~b_file != 0:
-            res |= pos >> np.uint64(10) & ~occupied
-        if pos & ~rank_8 & ~a_file & ~b_file != 0:
-            res |= pos << np.uint64(6) & ~occupied
-
-        return res
+        return attacks.KNIGHT_ATTACKS[bb_to_idx(pos)] & ~self.occupied(friendly_color)
 
 
-    def king_moves(self, pos: np.uint64, castling: bool = True) -> np.uint64:
+    def king_moves(self, pos: int, castling: bool = True) -> int:
         """
         Return a bitboard with bits set to 1 for all possible king moves from the position in the argument
         Ignore checking for castling possibilities if castling arg set to False - used by other methods to avoid recursion
         """
-        res = np.uint64(0)
-        if pos & self.pieces['wk'] != 0:
-            friendly_color = 0
-            if castling:
-                attacked_squares = self.attacked_squares_by_black()
-                if (self.white_oo and attacked_squares & np.uint64(0x70) == 0 and 
-                self.occupied() & np.uint64(0x60) == 0 and self.pieces['wr'] & idx_to_bb(7) != 0):
-                    res |= np.uint64(1 << 6)
-                if (self.white_ooo and attacked_squares & np.uint64(0x1c) == 0 and 
-                self.occupied() & np.uint64(0x0c) == 0 and self.pieces['wr'] & idx_to_bb(0) != 0):
-                    res |= np.uint64(1 << 2)
-        else:
-            friendly_color = 1
-            if castling:
-                attacked_squares = self.attacked_squares_by_white()
-                if (self.black_oo and attacked_squares & np.uint64(0x7000000000000000) == 0 and 
-                self.occupied() & np.uint64(0x6000000000000000) == 0 and self.pieces['br'] & idx_to_bb(63) != 0):
-                    res |= np.uint64(1 << 62)
-                if (self.black_ooo and attacked_squares & np.uint64(0x1c00000000000000) == 0 and 
-                    self.occupied() & np.uint64(0x0c00000000000000) == 0 and self.pieces['br'] & idx_to_bb(56) != 0):
-                    res |= np.uint64(1 << 58)
-        
-        a_file = np.uint64(0x0101010101010101)
-        h_file = np.uint64(0x8080808080808080)
-        rank_1 = np.uint64(0x00000000000000ff)
-        rank_8 = np.uint64(0xff00000000000000)
-
-        occupied = self.occupied(friendly_color)
-
-        if pos & ~rank_8 != 0:
-            res |= pos << np.uint64(8) & ~occupied
-        if pos & ~rank_1 != 0:
-            res |= pos >> np.uint64(8) & ~occupied
-        if pos & ~h_file != 0:
-            res |= pos << np.uint64(1) & ~occupied
-        if pos & ~a_file != 0:
-            res |= pos >> np.uint64(1) & ~occupied
-        if pos & ~rank_8 & ~a_file != 0:
-            res |= pos << np.uint64(7) & ~occupied
-        if pos & ~rank_8 & ~h_file != 0:
-            res |= pos << np.uint64(9) & ~occupied
-        if pos & ~rank_1 & ~a_file != 0:
-            res |= pos >> np.uint64(9) & ~occupied
-        if pos & ~rank_1 & ~h_file != 0:
-            res |= pos >> np.uint64(7) & ~occupied
-        return res
+        res = 0
+        friendly_color = 0 if pos & self.pieces['wk'] != 0 else 1
+        if castling and not self.is_square_attacked(bb_to_idx(pos), 1 - friendly_color):
+            res |= self.castling_targets(friendly_color)
+        return res | attacks.KING_ATTACKS[bb_to_idx(pos)] & ~self.occupied(friendly_color)
     
-    def pos_moves(self, pos: np.uint64) -> list[Move]:
+    def pos_moves(self, pos: int) -> array:
         """
-        Return a list of all possible moves from the position in arg
+        Return an array of all possible moves from the position in arg in the packed integer form
         """
         piece_type = self.get_piece_type(pos)
         if piece_type is None:
-            return []
-        moves = self.pos_targets(pos)
-        res = []
-        if piece_type[1] != 'p' or moves & np.uint64(0xff000000000000ff) == 0:
-            for dst in generate_positions(moves):
-                res.append(Move(pos, dst, piece_type[1], piece_type[0]))
-        else:
-            for dst in generate_positions(moves):
-                for promotion_type in ['q', 'b', 'n', 'r']:
-                    res.append(Move(pos, dst, piece_type[1], piece_type[0], promotion_type))
+            return array('H')
+        return self.moves_from_targets(pos, piece_type, self.pos_targets(pos))
+
+    def moves_from_targets(self, pos: int, piece_type: str, targets: int) -> array:
+        """
+        Return an array of packed moves of the piece of arg type from the arg position to every destination in the targets 
+        bitboard, pawn moves to the last rank are expanded into all four promotions
+        """
+        res = array('H')
+        src_idx = bb_to_idx(pos)
+        if piece_type[1] == 'p':
+            if targets & self.en_passant_square != 0:
+                res.append(encode_move(src_idx, bb_to_idx(self.en_passant_square), None, MOVE_EN_PASSANT))
+                targets &= ~self.en_passant_square
+            if targets & bitboard.PROMOTION_RANKS != 0:
+                for dst_idx in bitboard.iterate_indices(targets):
+                    for promotion_type in PROMOTION_ORDER:
+                        res.append(encode_move(src_idx, dst_idx, promotion_type, MOVE_PROMOTION))
+                return res
+        elif piece_type[1] == 'k':
+            for dst_idx in bitboard.iterate_indices(targets):
+                res.append(encode_move(src_idx, dst_idx, None, MOVE_CASTLING if abs(dst_idx - src_idx) == 2 else MOVE_NORMAL))
+            return res
+        for dst_idx in bitboard.iterate_indices(targets):
+            res.append(src_idx | dst_idx << 6)
         return res
 
-    def pos_targets(self, pos: np.uint64) -> np.uint64:
+    def pos_targets(self, pos: int) -> int:
         """
         Return a biboard of all possible move destinations from the given position
         """
@@ -425,78 +364,352 @@ class BoardState():
             return self.queen_moves(pos)
         elif pos & (self.pieces['br'] | self.pieces['wr']) != 0:
             return self.rook_moves(pos)
-        return np.uint64(0)
+        return 0
+
+    def pawn_attack_map(self, color: int) -> int:
+        """
+        Return a bitboard of all squares attacked by pawns of the arg color, pawn pushes are not counted as attacks
+        """
+        return attacks.pawn_attacks(self.pieces['wp' if color == 0 else 'bp'], color)
+
+    def generate_pawn_moves(self, color: int, pawns: int = None, target_mask: int = bitboard.MASK_64, en_passant: bool = True) -> array:
+        """
+        Return an array of packed pseudo-legal moves of all pawns of the arg color, or only of those in the pawns bitboard if provided.
+        Moves are generated set-wise - single pushes, double pushes and both capture directions are each computed by shifting
+        the whole pawn bitboard at once and every destination is mapped back to its source by the constant shift of its direction.
+        Only destinations in the target mask are kept, moves to the last rank are expanded into all four promotions.
+        En passant captures ignore the target mask and are left out if en_passant is False
+        """
+        if pawns is None:
+            pawns = self.pieces['wp' if color == 0 else 'bp']
+        res = array('H')
+        empty = ~self.total_occupancy & bitboard.MASK_64
+        push_delta = attacks.PAWN_PUSH_SHIFTS[color]
+        single_pushes = bitboard.shift(pawns, push_delta) & empty
+        double_pushes = bitboard.shift(single_pushes & (bitboard.RANK_3 if color == 0 else bitboard.RANK_6), push_delta) & empty
+        _append_shifted_moves(res, single_pushes & target_mask, push_delta, True)
+        _append_shifted_moves(res, double_pushes & target_mask, 2 * push_delta)
+        enemy = self.color_occupancy[1 - color] & target_mask
+        for delta, mask in attacks.PAWN_CAPTURE_SHIFTS[color]:
+            captures = bitboard.shift(pawns, delta) & mask
+            _append_shifted_moves(res, captures & enemy, delta, True)
+            if en_passant and captures & self.en_passant_square != 0:
+                dst_idx = bb_to_idx(self.en_passant_square)
+                res.append(encode_move(dst_idx - delta, dst_idx, None, MOVE_EN_PASSANT))
+        return res
+
+    def generate_knight_moves(self, color: int, knights: int = None, target_mask: int = bitboard.MASK_64) -> array:
+        """
+        Return an array of packed pseudo-legal moves of all knights of the arg color, or only of those in the knights bitboard if provided.
+        Moves are generated set-wise by shifting the whole knight bitboard once per jump direction,
+        only destinations in the target mask are kept
+        """
+        if knights is None:
+            knights = self.pieces['wn' if color == 0 else 'bn']
+        res = array('H')
+        target_mask &= ~self.color_occupancy[color]
+        for delta, mask in attacks.KNIGHT_SHIFTS:
+            _append_shifted_moves(res, bitboard.shift(knights, delta) & mask & target_mask, delta)
+        return res
 
-    def get_all_pseudo_legal_moves(self, to_move: int) -> list[Move]:
+    def get_all_pseudo_legal_moves(self, to_move: int, shuffle: bool = False, rng: random.Random = None) -> array:
         """
-        Return a list of all possible pseudo-legal moves for the player color provided in the argument
-        ordered in a specific way
-        This method is only used in move search algorithm for performance purposes
+        Return an array of all possible pseudo-legal moves in the packed integer form for the player color provided 
+        in the argument ordered by piece type, shuffled per piece type (per piece for sliders and the king) if shuffle is True.
+        Shuffling uses the arg random generator if provided so it can be seeded, else the global one
         """
-        res = []
+        res = array('H')
+        shuffle_moves = (rng if rng is not None else random).shuffle
         if to_move == 0:
             col = 'w'
         else:
             col = 'b'
-        for type in ['p', 'n', 'b', 'q', 'r', 'k']:
+        for moves in (self.generate_pawn_moves(to_move), self.generate_knight_moves(to_move)):
+            if shuffle:
+                shuffle_moves(moves)
+            res.extend(moves)
+        for type in ['b', 'q', 'r', 'k']:
             for pos in generate_positions(self.pieces[col + type]):
                 moves = self.pos_moves(pos)
-                random.shuffle(moves)
+                if shuffle:
+                    shuffle_moves(moves)
                 res.extend(moves)
         return res
 
-    def attacked_squares_by_black(self) -> np.uint64:
+    def get_attackers(self, idx: int, by_color: int, occupancy: int = None) -> int:
         """
-        Return a bitboard of all squares currently being attacked by black pieces
+        Return a bitboard of all pieces of the arg color attacking the square with the arg index. 
+        Sliding attacks are computed with the occupancy in argument if provided, else with the current occupancy
+        """
+        if occupancy is None:
+            occupancy = self.total_occupancy
+        col = 'w' if by_color == 0 else 'b'
+        return ((attacks.PAWN_ATTACKS[1 - by_color][idx] & self.pieces[col + 'p']) |
+                (attacks.KNIGHT_ATTACKS[idx] & self.pieces[col + 'n']) |
+                (attacks.KING_ATTACKS[idx] & self.pieces[col + 'k']) |
+                (attacks.bishop_attacks(idx, occupancy) & (self.pieces[col + 'b'] | self.pieces[col + 'q'])) |
+                (attacks.rook_attacks(idx, occupancy) & (self.pieces[col + 'r'] | self.pieces[col + 'q'])))
+
+    def is_square_attacked(self, idx: int, by_color: int, occupancy: int = None) -> bool:
+        """
+        Return true if the square with the arg index is attacked by any piece of the arg color else false.
+        Attack patterns are cast outward from the square, cheapest first, and the lookup stops at the first attacker found.
+        Sliding attacks are computed with the occupancy in argument if provided, else with the current occupancy
         """
-        res = np.uint64(0)
-        for pos in generate_positions(self.pieces['bp']):
-            res |= self.pawn_moves(pos)
-        for pos in generate_positions(self.pieces['bb']):
-            res |= self.bishop_moves(pos)
-        for pos in generate_positions(self.pieces['bn']):
-            res |= self.knight_moves(pos)
-        for pos in generate_positions(self.pieces['bq']):
-            res |= self.queen_moves(pos)
-        for pos in generate_positions(self.pieces['bk']):
-            res |= self.king_moves(pos, castling = False)
-        for pos in generate_positions(self.pieces['br']):
-            res |= self.rook_moves(pos)
+        col = 'w' if by_color == 0 else 'b'
+        pieces = self.pieces
+        if (attacks.PAWN_ATTACKS[1 - by_color][idx] & pieces[col + 'p'] or attacks.KNIGHT_ATTACKS[idx] & pieces[col + 'n'] or
+            attacks.KING_ATTACKS[idx] & pieces[col + 'k']):
+            return True
+        if occupancy is None:
+            occupancy = self.total_occupancy
+        queens = pieces[col + 'q']
+        bishops = pieces[col + 'b'] | queens
+        if bishops and attacks.bishop_attacks(idx, occupancy) & bishops:
+            return True
+        rooks = pieces[col + 'r'] | queens
+        return rooks != 0 and attacks.rook_attacks(idx, occupancy) & rooks != 0
+
+    def get_pinned_pieces(self, color: int) -> dict[int : int]:
+        """
+        Return a dict mapping square indices of all pieces of the arg color pinned to their own king to a bitboard
+        of the squares they can move to without leaving the pin line (squares between the king and the pinner and the pinner itself)
+        """
+        res = {}
+        col = 'w' if color == 0 else 'b'
+        enemy_col = 'b' if color == 0 else 'w'
+        king_idx = bb_to_idx(self.pieces[col + 'k'])
+        enemy_occupancy = self.color_occupancy[1 - color]
+        snipers = ((attacks.rook_attacks(king_idx, enemy_occupancy) & (self.pieces[enemy_col + 'r'] | self.pieces[enemy_col + 'q'])) |
+                   (attacks.bishop_attacks(king_idx, enemy_occupancy) & (self.pieces[enemy_col + 'b'] | self.pieces[enemy_col + 'q'])))
+        for sniper_idx in bitboard.iterate_indices(snipers):
+            line = attacks.BETWEEN[king_idx][sniper_idx]
+            blockers = line & self.total_occupancy
+            if blockers.bit_count() == 1 and blockers & self.color_occupancy[color] != 0:
+                res[bb_to_idx(blockers)] = line | 1 << sniper_idx
         return res
-    
-    def attacked_squares_by_white(self) -> np.uint64:
+
+    def get_all_legal_moves(self, to_move: int, shuffle: bool = False, rng: random.Random = None, captures_only: bool = False) -> array:
+        """
+        Return an array of all legal moves in the packed integer form for the player color provided in the argument.
+        Checkers, pinned pieces and the evasion mask are computed once for the position, so no move has to be played
+        to test its legality - except for en passant captures which can expose the king along the rank of both pawns.
+        Pawn and knight moves are generated set-wise for all unpinned pieces at once, pinned knights can never move.
+        Moves are ordered by piece type like the pseudo-legal moves, shuffled per piece type (per piece for sliders)
+        if shuffle is True, with the arg random generator if provided.
+        If captures_only is True, only captures and promotions are generated - every destination is masked before any move is built
+        """
+        res = array('H')
+        shuffle_moves = (rng if rng is not None else random).shuffle
+        col = 'w' if to_move == 0 else 'b'
+        friendly = self.color_occupancy[to_move]
+        king = self.pieces[col + 'k']
+        king_idx = bb_to_idx(king)
+        checkers = self.get_attackers(king_idx, 1 - to_move)
+        capture_mask = self.color_occupancy[1 - to_move] if captures_only else bitboard.MASK_64
+
+        king_targets = 0
+        occupancy_without_king = self.total_occupancy & ~king
+        for dst_idx in bitboard.iterate_indices(attacks.KING_ATTACKS[king_idx] & ~friendly & capture_mask):
+            if not self.is_square_attacked(dst_idx, 1 - to_move, occupancy_without_king):
+                king_targets |= 1 << dst_idx
+        if checkers == 0 and not captures_only:
+            king_targets |= self.castling_targets(to_move)
+        king_moves = self.moves_from_targets(king, col + 'k', king_targets)
+        if shuffle:
+            shuffle_moves(king_moves)
+
+        if checkers.bit_count() > 1:
+            return king_moves
+        if checkers != 0:
+            evasion_mask = checkers | attacks.BETWEEN[king_idx][bb_to_idx(checkers)]
+        else:
+            evasion_mask = bitboard.MASK_64
+        pinned = self.get_pinned_pieces(to_move)
+        pinned_pieces = 0
+        for idx in pinned:
+            pinned_pieces |= 1 << idx
+
+        pawns = self.pieces[col + 'p']
+        pawn_mask = evasion_mask & (capture_mask | bitboard.PROMOTION_RANKS)
+        pawn_moves = self.generate_pawn_moves(to_move, pawns & ~pinned_pieces, pawn_mask, False)
+        for idx in bitboard.iterate_indices(pawns & pinned_pieces):
+            pawn_moves.extend(self.generate_pawn_moves(to_move, 1 << idx, pawn_mask & pinned[idx], False))
+        evasion_mask &= capture_mask
+        if self.en_passant_square != 0:
+            dst_idx = bb_to_idx(self.en_passant_square)
+            for src_idx in bitboard.iterate_indices(attacks.PAWN_ATTACKS[1 - to_move][dst_idx] & pawns):
+                move = encode_move(src_idx, dst_idx, None, MOVE_EN_PASSANT)
+                undo = self.make_move(move)
+                if not self.king_in_check(to_move):
+                    pawn_moves.append(move)
+                self.unmake_move(undo)
+        knight_moves = self.generate_knight_moves(to_move, self.pieces[col + 'n'] & ~pinned_pieces, evasion_mask)
+        for moves in (pawn_moves, knight_moves):
+            if shuffle:
+                shuffle_moves(moves)
+            res.extend(moves)
+
+        for type in ['b', 'q', 'r']:
+            for pos in generate_positions(self.pieces[col + type]):
+                targets = self.pos_targets(pos) & evasion_mask
+                idx = bb_to_idx(pos)
+                if idx in pinned:
+                    targets &= pinned[idx]
+                moves = self.moves_from_targets(pos, col + type, targets)
+                if shuffle:
+                    shuffle_moves(moves)
+                res.extend(moves)
+        res.extend(king_moves)
+        return res
+
+    def get_legal_captures(self, to_move: int) -> array:
         """
-        Return a bitboard of all squares currently being attacked by black pieces
+        Return an array of all legal captures and promotions in the packed integer form for the player color provided in the argument,
+        used by the quiescence search
+        """
+        return self.get_all_legal_moves(to_move, captures_only = True)
+
+    def has_legal_moves(self, to_move: int) -> bool:
+        """
+        Return true if the player of arg color has at least one legal move else false.
+        Uses the same checkers, pins and evasion mask as get_all_legal_moves but stops at the first legal move found,
+        trying the king first and building no move lists for the other pieces. Castling never has to be tested as
+        the king can legally step onto the square it passes through whenever castling is legal
+        """
+        col = 'w' if to_move == 0 else 'b'
+        friendly = self.color_occupancy[to_move]
+        king = self.pieces[col + 'k']
+        king_idx = bb_to_idx(king)
+        occupancy_without_king = self.total_occupancy & ~king
+        for dst_idx in bitboard.iterate_indices(attacks.KING_ATTACKS[king_idx] & ~friendly):
+            if not self.is_square_attacked(dst_idx, 1 - to_move, occupancy_without_king):
+                return True
+
+        checkers = self.get_attackers(king_idx, 1 - to_move)
+        if checkers.bit_count() > 1:
+            return False
+        if checkers != 0:
+            evasion_mask = checkers | attacks.BETWEEN[king_idx][bb_to_idx(checkers)]
+        else:
+            evasion_mask = bitboard.MASK_64
+        pinned = self.get_pinned_pieces(to_move)
+        pinned_pieces = 0
+        for idx in pinned:
+            pinned_pieces |= 1 << idx
+
+        targets = evasion_mask & ~friendly
+        if attacks.knight_attacks(self.pieces[col + 'n'] & ~pinned_pieces) & targets != 0:
+            return True
+        pawns = self.pieces[col + 'p']
+        if len(self.generate_pawn_moves(to_move, pawns & ~pinned_pieces, evasion_mask, False)) != 0:
+            return True
+        for type in ['b', 'q', 'r']:
+            for idx in bitboard.iterate_indices(self.pieces[col + type]):
+                piece_targets = self.pos_targets(1 << idx) & targets
+                if idx in pinned:
+                    piece_targets &= pinned[idx]
+                if piece_targets != 0:
+                    return True
+        for idx in bitboard.iterate_indices(pawns & pinned_pieces):
+            if len(self.generate_pawn_moves(to_move, 1 << idx, evasion_mask & pinned[idx], False)) != 0:
+                return True
+        if self.en_passant_square != 0:
+            dst_idx = bb_to_idx(self.en_passant_square)
+            for src_idx in bitboard.iterate_indices(attacks.PAWN_ATTACKS[1 - to_move][dst_idx] & pawns):
+                undo = self.make_move(encode_move(src_idx, dst_idx, None, MOVE_EN_PASSANT))
+                in_check = self.king_in_check(to_move)
+                self.unmake_move(undo)
+                if not in_check:
+                    return True
+        return False
+
+    def castling_targets(self, color: int) -> int:
+        """
+        Return a bitboard of the king destinations of all castling moves available to the player of arg color,
+        assuming the king is not currently in check
+        """
+        res = 0
+        if color == 0:
+            if (self.white_oo and self.total_occupancy & 0x60 == 0 and self.pieces['wr'] & idx_to_bb(7) != 0 and
+                not self.is_square_attacked(5, 1) and not self.is_square_attacked(6, 1)):
+                res |= 1 << 6
+            if (self.white_ooo and self.total_occupancy & 0x0e == 0 and self.pieces['wr'] & idx_to_bb(0) != 0 and
+                not self.is_square_attacked(3, 1) and not self.is_square_attacked(2, 1)):
+                res |= 1 << 2
+            return res
+        if (self.black_oo and self.total_occupancy & 0x6000000000000000 == 0 and self.pieces['br'] & idx_to_bb(63) != 0 and
+            not self.is_square_attacked(61, 0) and not self.is_square_attacked(62, 0)):
+            res |= 1 << 62
+        if (self.black_ooo and self.total_occupancy & 0x0e00000000000000 == 0 and self.pieces['br'] & idx_to_bb(56) != 0 and
+            not self.is_square_attacked(59, 0) and not self.is_square_attacked(58, 0)):
+            res |= 1 << 58
+        return res
+
+    def compute_attacked_squares(self, color: int) -> int:
+        """
+        Compute a bitboard of all squares currently being attacked by pieces of the arg color
         """
-        res = np.uint64(0)
-        for pos in generate_positions(self.pieces['wp']):
-            res |= self.pawn_moves(pos)
-        for pos in generate_positions(self.pieces['wb']):
-            res |= self.bishop_moves(pos)
-        for pos in generate_positions(self.pieces['wn']):
-            res |= self.knight_moves(pos)
-        for pos in generate_positions(self.pieces['wq']):
-            res |= self.queen_moves(pos)
-        for pos in generate_positions(self.pieces['wk']):
-            res |= self.king_moves(pos, castling = False)
-        for pos in generate_positions(self.pieces['wr']):
-            res |= self.rook_moves(pos)
+        col = 'w' if color == 0 else 'b'
+        occupied = self.occupied()
+        res = self.pawn_attack_map(color) | attacks.knight_attacks(self.pieces[col + 'n'])
+        for idx in bitboard.iterate_indices(self.pieces[col + 'b'] | self.pieces[col + 'q']):
+            res |= attacks.bishop_attacks(idx, occupied)
+        for idx in bitboard.iterate_indices(self.pieces[col + 'r'] | self.pieces[col + 'q']):
+            res |= attacks.rook_attacks(idx, occupied)
+        for idx in bitboard.iterate_indices(self.pieces[col + 'k']):
+            res |= attacks.KING_ATTACKS[idx]
         return res
+
+    def attacked_squares_by_black(self) -> int:
+        """
+        Return a bitboard of all squares currently being attacked by black pieces
+        """
+        return self.compute_attacked_squares(1)
+    
+    def attacked_squares_by_white(self) -> int:
+        """
+        Return a bitboard of all squares currently being attacked by white pieces
+        """
+        return self.compute_attacked_squares(0)
     
-    def delete_piece(self, pos: np.uint64):
+    def delete_piece(self, pos: int):
         """
         Delete the piece occupying the arg position
         """
-        for key in self.pieces:
-            self.pieces[key] &= ~pos
+        idx = bb_to_idx(pos)
+        type = self.mailbox[idx]
+        if type is None:
+            return
+        self.mailbox[idx] = None
+        self.pieces[type] &= ~pos
+        color = 0 if type[0] == 'w' else 1
+        self.color_occupancy[color] &= ~pos
+        self.total_occupancy &= ~pos
+        self.piece_counts[type] -= 1
+        self.material[color] -= cf.PIECE_VALUES[type[1]]
+        self.mg_score -= evaluation.MG_SQUARE_VALUES[type][idx]
+        self.eg_score -= evaluation.EG_SQUARE_VALUES[type][idx]
+        self.phase -= evaluation.PHASE_WEIGHTS[type[1]]
+        self.zobrist_key ^= zobrist.PIECE_KEYS[type][idx]
     
-    def add_piece(self, color: str, type: str, pos: np.uint64):
+    def add_piece(self, color: str, type: str, pos: int):
         """
         Add piece of given type and color to the target position
         """
+        idx = bb_to_idx(pos)
+        self.mailbox[idx] = color + type
         self.pieces[color + type] |= pos
+        self.color_occupancy[0 if color == 'w' else 1] |= pos
+        self.total_occupancy |= pos
+        self.piece_counts[color + type] += 1
+        self.material[0 if color == 'w' else 1] += cf.PIECE_VALUES[type]
+        self.mg_score += evaluation.MG_SQUARE_VALUES[color + type][idx]
+        self.eg_score += evaluation.EG_SQUARE_VALUES[color + type][idx]
+        self.phase += evaluation.PHASE_WEIGHTS[type]
+        self.zobrist_key ^= zobrist.PIECE_KEYS[color + type][idx]
 
-    def move_piece(self, src: np.uint64, dst: np.uint64):
+    def move_piece(self, src: int, dst: int):
         """
         Move piece from the source position to the destination position
         """
@@ -513,120 +726,187 @@ class BoardState():
         """
         if pseudo_legality_check and move.dst & self.pos_targets(move.src) == 0:
             return False
-        src_idx = bb_to_idx(move.src)
-        dst_idx = bb_to_idx(move.dst)
-        if dst_idx == 63 and self.black_oo:
-            self.black_oo = False
-        elif dst_idx == 56 and self.black_ooo:
-            self.black_ooo = False
-        elif dst_idx == 0 and self.white_ooo:
-            self.white_ooo = False
-        elif dst_idx == 7 and self.white_oo:
-            self.white_oo = False
-        en_passant = False
-        capture_square = move.dst
-        if move.type == 'p' and move.color == 'w':
-            if dst_idx - src_idx == 16:
-                self.en_passant_square = move.dst >> np.uint64(8)
-                en_passant = True
-            elif (dst_idx - src_idx == 7 or dst_idx - src_idx == 9) and self.en_passant_square == move.dst:
-                capture_square = move.dst >> np.uint64(8)
-            self.delete_piece(capture_square)
+        self.make_move(self.encode_move(move))
+        return True
 
-            if dst_idx // 8 == 7:
-                self.delete_piece(move.src)
-                self.add_piece(move.color, move.promotion_type, move.dst)
-            else:
-                self.move_piece(move.src, move.dst)            
-                        
-        elif move.type == 'p' and move.color == 'b':
-            if dst_idx - src_idx == -16:
-                self.en_passant_square = move.dst << np.uint64(8)
-                en_passant = True
-            elif (dst_idx - src_idx == -7 or dst_idx - src_idx == -9) and self.en_passant_square == move.dst:
-                capture_square = move.dst << np.uint64(8)
+    def encode_move(self, move: Move) -> int:
+        """
+        Return the packed integer form of the arg move in the context of the current board state,
+        marking pawn captures onto the en passant target square as en passant captures
+        """
+        if (move.type == 'p' and move_flag(move.code) == MOVE_NORMAL and move.dst == self.en_passant_square and
+            (move.code ^ (move.code >> 6)) & 0x7 != 0):
+            return move.code | MOVE_EN_PASSANT << 14
+        return move.code
+
+    def decode_move(self, move: int) -> Move:
+        """
+        Return the Move object of the arg packed move in the context of the current board state
+        """
+        return Move.from_code(move, self.mailbox[move & 0x3f])
+
+    def make_move(self, move: int) -> tuple:
+        """
+        Play the arg packed move on the board state without checking its pseudo-legality and return an undo record
+        that restores the previous board state exactly when passed to unmake_move. The record holds the move,
+        the captured piece type, the previous en passant square, castling rights and zobrist key.
+        The zobrist key is updated incrementally along the way
+        """
+        src_idx = move & 0x3f
+        dst_idx = (move >> 6) & 0x3f
+        flag = move >> 14
+        src = idx_to_bb(src_idx)
+        dst = idx_to_bb(dst_idx)
+        piece_type = self.mailbox[src_idx]
+        previous_en_passant_square = self.en_passant_square
+        previous_castling_rights = (self.white_oo, self.white_ooo, self.black_oo, self.black_ooo)
+        previous_zobrist_key = self.zobrist_key
+        self.zobrist_key ^= zobrist.castling_key(*previous_castling_rights) ^ zobrist.en_passant_key(bb_to_idx(self.en_passant_square))
+
+        if flag == MOVE_EN_PASSANT:
+            capture_square = dst >> 8 if piece_type[0] == 'w' else dst << 8
+        else:
+            capture_square = dst
+        captured = self.get_piece_type(capture_square)
+        if captured is not None:
             self.delete_piece(capture_square)
-            if dst_idx // 8 == 0:
-                self.delete_piece(move.src)
-                self.add_piece(move.color, move.promotion_type, move.dst)
-            else:
-                self.move_piece(move.src, move.dst)
+        if flag == MOVE_PROMOTION:
+            self.delete_piece(src)
+            self.add_piece(piece_type[0], move_promotion_type(move), dst)
+        else:
+            self.move_piece(src, dst)
+        if flag == MOVE_CASTLING:
+            rook_src, rook_dst = CASTLING_ROOK_SQUARES[dst_idx]
+            self.move_piece(idx_to_bb(rook_src), idx_to_bb(rook_dst))
 
+        if piece_type[1] == 'p' and abs(dst_idx - src_idx) == 16:
+            self.en_passant_square = idx_to_bb((src_idx + dst_idx) // 2)
         else:
-            self.delete_piece(move.dst)
-            self.move_piece(move.src, move.dst)
-        if not en_passant:
-            self.en_passant_square = np.uint64(0)
-            
-        if move.type == 'k' and move.color == 'w':
-            if src_idx == 4 and dst_idx == 6:
-                self.move_piece(np.uint64(1 << 7), np.uint64(1 << 5))
-            elif src_idx == 4 and dst_idx == 2:
-                self.move_piece(np.uint64(1), np.uint64(1 << 3))
+            self.en_passant_square = 0
+
+        if self.white_oo and (src_idx == 4 or src_idx == 7 or dst_idx == 7):
             self.white_oo = False
+        if self.white_ooo and (src_idx == 4 or src_idx == 0 or dst_idx == 0):
             self.white_ooo = False
-        
-        elif move.type == 'k' and move.color == 'b':
-            if src_idx == 60 and dst_idx == 62:
-                self.move_piece(np.uint64(1 << 63), np.uint64(1 << 61))
-            elif src_idx == 60 and dst_idx == 58:
-                self.move_piece(np.uint64(1 << 56), np.uint64(1 << 59))
+        if self.black_oo and (src_idx == 60 or src_idx == 63 or dst_idx == 63):
             self.black_oo = False
+        if self.black_ooo and (src_idx == 60 or src_idx == 56 or dst_idx == 56):
             self.black_ooo = False
 
-        elif move.type == 'r' and move.color == 'w':
-            if self.white_oo and src_idx == 7:
-                self.white_oo = False
-            elif self.white_ooo and src_idx == 0:
-                self.white_ooo = False            
-        
-        elif move.type == 'r' and move.color == 'b':
-            if self.black_oo and src_idx == 63:
-                self.black_oo = False
-            elif self.black_ooo and src_idx == 56:
-                self.black_ooo = False
-        
-        return True
+        self.zobrist_key ^= (zobrist.castling_key(self.white_oo, self.white_ooo, self.black_oo, self.black_ooo) ^ 
+                             zobrist.en_passant_key(bb_to_idx(self.en_passant_square)) ^ zobrist.BLACK_TO_MOVE_KEY)
+        self.to_move = 1 - self.to_move
+        return move, captured, previous_en_passant_square, previous_castling_rights, previous_zobrist_key
+
+    def unmake_move(self, undo: tuple):
+        """
+        Take back the move described by the arg undo record returned by make_move, the move has to be 
+        the last one played on this board state
+        """
+        move, captured, en_passant_square, castling_rights, zobrist_key = undo
+        src_idx = move & 0x3f
+        dst_idx = (move >> 6) & 0x3f
+        flag = move >> 14
+        src = idx_to_bb(src_idx)
+        dst = idx_to_bb(dst_idx)
+        if flag == MOVE_PROMOTION:
+            color = self.mailbox[dst_idx][0]
+            self.delete_piece(dst)
+            self.add_piece(color, 'p', src)
+        else:
+            self.move_piece(dst, src)
+        if flag == MOVE_CASTLING:
+            rook_src, rook_dst = CASTLING_ROOK_SQUARES[dst_idx]
+            self.move_piece(idx_to_bb(rook_dst), idx_to_bb(rook_src))
+        if captured is not None:
+            if flag == MOVE_EN_PASSANT:
+                capture_square = dst >> 8 if captured[0] == 'b' else dst << 8
+            else:
+                capture_square = dst
+            self.add_piece(captured[0], captured[1], capture_square)
+        self.en_passant_square = en_passant_square
+        self.white_oo, self.white_ooo, self.black_oo, self.black_ooo = castling_rights
+        self.zobrist_key = zobrist_key
+        self.to_move = 1 - self.to_move
+
+    def make_null_move(self) -> tuple:
+        """
+        Pass the turn to the other player without moving a piece and return an undo record for unmake_null_move.
+        The en passant target square is cleared, as it would be by any real move, and the zobrist key is updated
+        """
+        undo = self.en_passant_square, self.zobrist_key
+        self.zobrist_key ^= zobrist.en_passant_key(bb_to_idx(self.en_passant_square)) ^ zobrist.BLACK_TO_MOVE_KEY
+        self.en_passant_square = 0
+        self.to_move = 1 - self.to_move
+        return undo
+
+    def unmake_null_move(self, undo: tuple):
+        """
+        Take back the null move described by the arg undo record returned by make_null_move
+        """
+        self.en_passant_square, self.zobrist_key = undo
+        self.to_move = 1 - self.to_move
 
     def king_in_check(self, color: int) -> bool:
         """
-        Return true if king of target color is in check else false
+        Return true if king of target color is in check else false, only the king square is looked up
         """
-        if color == 0:
-            return self.pieces['wk'] & self.attacked_squares_by_black() != 0
-        return self.pieces['bk'] & self.attacked_squares_by_white() != 0
+        return self.is_square_attacked(bb_to_idx(self.pieces['wk' if color == 0 else 'bk']), 1 - color)
     
     def get_material_count(self, color: int) -> int:
         """
-        Return sum of values of all pieces of the arg color.
+        Return sum of values of all pieces of the arg color
         """
-        if color == 0:
-            return (int(self.pieces['wb']).bit_count() * 3 + int(self.pieces['wp']).bit_count() + int(self.pieces['wr']).bit_count() * 5 + 
-                    int(self.pieces['wn']).bit_count() * 3 + int(self.pieces['wq']).bit_count() * 9)
-        return (int(self.pieces['bb']).bit_count() * 3 + int(self.pieces['bp']).bit_count() + int(self.pieces['br']).bit_count() * 5 + 
-                int(self.pieces['bn']).bit_count() * 3 + int(self.pieces['bq']).bit_count() * 9)
+        return self.material[color]
+
+    def get_evaluation(self) -> int:
+        """
+        Return the static evaluation of the board state in centipawns from the white point of view - the piece-square table
+        scores tapered by the game phase
+        """
+        return evaluation.tapered_score(self.mg_score, self.eg_score, self.phase)
+
+    def get_piece_count(self, piece_type: str) -> int:
+        """
+        Return number of pieces of the arg color and type, e.g. 'wn' for white knights
+        """
+        return self.piece_counts[piece_type]
             
+    def has_non_pawn_material(self, color: int) -> bool:
+        """
+        Return true if the player of arg color has any piece other than the king and pawns
+        """
+        return self.material[color] > self.piece_counts['wp' if color == 0 else 'bp'] * cf.PIECE_VALUES['p']
+
     def has_insufficient_material(self, color: int) -> bool:
         """
         Return true if the player of arg color has insufficient amount of material to force checkmate else false
         """
-        if color == 0:
-            return self.get_material_count(color) < 4 and self.pieces['wp'] == 0
-        return self.get_material_count(color) < 4 and self.pieces['bp'] == 0
+        return self.material[color] < 4 and self.piece_counts['wp' if color == 0 else 'bp'] == 0
     
     def get_position_hash(self, color: int) -> int:
         """
-        Return hash of the current board state, used by other methods for threefold repetition checks
+        Return the zobrist key of the current board state with the arg color on move, 
+        used by other methods for threefold repetition checks
         """
-        return hash((
-            self.pieces['wp'], self.pieces['wn'], self.pieces['wb'], 
-            self.pieces['wr'], self.pieces['wq'], self.pieces['wk'], 
-            self.pieces['bp'], self.pieces['bn'], self.pieces['bb'], 
-            self.pieces['br'], self.pieces['bq'], self.pieces['bk'], 
-            self.en_passant_square, color,
-            self.black_oo, self.black_ooo,
-            self.white_oo, self.white_ooo
-        ))
+        if color == self.to_move:
+            return self.zobrist_key
+        return self.zobrist_key ^ zobrist.BLACK_TO_MOVE_KEY
+
+    def compute_zobrist_key(self) -> int:
+        """
+        Compute the zobrist key of the current board state from scratch, covering piece positions, 
+        player on move, castling rights and the file of the en passant target square
+        """
+        res = 0
+        for type, positions in self.pieces.items():
+            for idx in bitboard.iterate_indices(positions):
+                res ^= zobrist.PIECE_KEYS[type][idx]
+        if self.to_move == 1:
+            res ^= zobrist.BLACK_TO_MOVE_KEY
+        res ^= zobrist.castling_key(self.white_oo, self.white_ooo, self.black_oo, self.black_ooo)
+        res ^= zobrist.en_passant_key(bb_to_idx(self.en_passant_square))
+        return res
 
     def is_pawn_or_capture(self, move: Move) -> bool:
         """
@@ -639,20 +919,51 @@ class BoardState():
             return True
         return False
     
-    def get_piece_positions(self) -> dict[str : np.uint64]:
+    def get_piece_positions(self) -> dict[str : int]:
         """
         Return positions of all pieces
         """
         return self.pieces
     
-    def get_piece_type(self, pos: np.uint64) -> str | None:
+    def get_mailbox(self) -> list[str | None]:
+        """
+        Return the 64-entry mailbox mapping every square index to the color and type of the piece occupying it or None
+        """
+        return self.mailbox
+    
+    def get_piece_type(self, pos: int) -> str | None:
         """
         Return color and type of the piece occupying the arg position or None if pos is empty
         """
-        for key in self.pieces:
-            if self.pieces[key] & pos != 0:
-                return key
-        return None
+        if pos == 0:
+            return None
+        return self.mailbox[bb_to_idx(pos)]
+
+    def to_fen(self, half_move_count: int = 0, full_move_count: int = 1) -> str:
+        """
+        Return the fen string of the current board state, the board state does not track the move counters
+        so they are taken from the arguments
+        """
+        ranks = []
+        for rank in range(7, -1, -1):
+            rank_fen = ''
+            empty = 0
+            for file in range(8):
+                piece_type = self.mailbox[file + rank * 8]
+                if piece_type is None:
+                    empty += 1
+                    continue
+                if empty != 0:
+                    rank_fen += str(empty)
+                    empty = 0
+                rank_fen += piece_type[1].upper() if piece_type[0] == 'w' else piece_type[1]
+            if empty != 0:
+                rank_fen += str(empty)
+            ranks.append(rank_fen)
+        castling_rights = ''.join(char for char, right in zip('KQkq', (self.white_oo, self.white_ooo, self.black_oo, self.black_ooo)) if right)
+        en_passant = '-' if self.en_passant_square == 0 else idx_to_pos(bb_to_idx(self.en_passant_square))
+        return ' '.join(['/'.join(ranks), 'w' if self.to_move == 0 else 'b', castling_rights or '-', en_passant, 
+                         str(half_move_count), str(full_move_count)])
 
 
 def pos_to_idx(pos: str) -> int:
@@ -671,25 +982,32 @@ def idx_to_pos(idx: int) -> str:
         raise ValueError('Invalid tile number argument')
     return chr(ord('a') + int(idx % 8)) + str(int(1 + (idx / 8)))
 
-def bb_to_idx(bb: np.uint64) -> int:
+def bb_to_idx(bb: int) -> int:
     """
     Return index of the most significant bit set to 1 in the arg bitboard
     """
-    return int(bb).bit_length() - 1
+    return bb.bit_length() - 1
 
-def idx_to_bb(idx: int) -> np.uint64:
+def idx_to_bb(idx: int) -> int:
     """
     Return bitboard with the bit at the arg index set to 1
     """
-    return np.uint64(1 << idx)
+    return 1 << idx
+
+def move_to_uci(move: int) -> str:
+    """
+    Return the arg packed move in UCI long algebraic notation, e.g. e2e4 or e7e8q
+    """
+    res = idx_to_pos(move_src(move)) + idx_to_pos(move_dst(move))
+    promotion_type = move_promotion_type(move)
+    if promotion_type is not None:
+        res += promotion_type
+    return res
 
-def generate_positions(positions: np.uint64):
+def generate_positions(positions: int):
     """
     Generate bitboards with a single bit set to 1 at a given index for every bit set to 1 
     at this index in the bitboard from argument
     """
-    while positions != 0:
-        cur = np.uint64(1 << bb_to_idx(positions))
-        yield cur
-        positions ^= cur
+    return bitboard.iterate_squares(positions)
 
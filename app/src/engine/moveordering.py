@@ -0,0 +1,105 @@
+"""
+Module implementing move ordering for the alpha-beta search. The earlier a move causing a cutoff is searched, the fewer
+moves are left to search, so moves are tried in the order: the hash move from the transposition table, captures and queen
+promotions ranked by most valuable victim / least valuable attacker, the killer moves of the current ply and finally the
+remaining quiet moves ranked by the history heuristic
+"""
+
+from array import array
+from app.src.engine import game_logic as gl
+
+HASH_MOVE_SCORE = 1000000
+CAPTURE_SCORE = 100000
+KILLER_SCORES = (90000, 80000)
+HISTORY_LIMIT = 60000
+
+# piece values used for ranking captures, the king is the least welcome attacker
+MVV_LVA_VALUES = {'p' : 1, 'n' : 3, 'b' : 3, 'r' : 5, 'q' : 9, 'k' : 10}
+
+KILLER_SLOTS = 2
+
+
+class MoveOrderer():
+    """
+    Class holding the killer moves and the history table of a search and ordering moves by them
+    """
+    def __init__(self, max_ply: int = 128):
+        """
+        MoveOrderer takes the maximum search ply as a constructor argument, killer moves are kept for every ply up to it
+        """
+        self.max_ply = max_ply
+        self.killers = [[0] * KILLER_SLOTS for _ in range(max_ply)]
+        self.history = array('i', bytes(4 * 2 * 64 * 64))
+
+    def clear(self):
+        """
+        Forget all killer moves and history scores
+        """
+        self.killers = [[0] * KILLER_SLOTS for _ in range(self.max_ply)]
+        self.history = array('i', bytes(4 * 2 * 64 * 64))
+
+    def new_search(self):
+        """
+        Prepare for a new search - killer moves are specific to the previous search tree and are dropped,
+        history scores are halved so they keep guiding the search but adapt to the new position
+        """
+        self.killers = [[0] * KILLER_SLOTS for _ in range(self.max_ply)]
+        for i in range(len(self.history)):
+            self.history[i] >>= 1
+
+    def score_move(self, board_state: gl.BoardState, move: int, ply: int, hash_move: int | None) -> int:
+        """
+        Return the ordering score of the arg packed move in the position of the arg board state, higher is searched earlier
+        """
+        if move == hash_move:
+            return HASH_MOVE_SCORE
+        mailbox = board_state.mailbox
+        src_idx = move & 0x3f
+        dst_idx = (move >> 6) & 0x3f
+        flag = move >> 14
+        victim = mailbox[dst_idx]
+        if victim is not None or flag == gl.MOVE_EN_PASSANT:
+            victim_value = MVV_LVA_VALUES[victim[1]] if victim is not None else MVV_LVA_VALUES['p']
+            score = CAPTURE_SCORE + victim_value * 10 - MVV_LVA_VALUES[mailbox[src_idx][1]]
+            if flag == gl.MOVE_PROMOTION and gl.move_promotion_type(move) == 'q':
+                score += MVV_LVA_VALUES['q'] * 10
+            return score
+        if flag == gl.MOVE_PROMOTION and gl.move_promotion_type(move) == 'q':
+            return CAPTURE_SCORE + MVV_LVA_VALUES['q'] * 10
+        if ply < self.max_ply:
+            killers = self.killers[ply]
+            for slot in range(KILLER_SLOTS):
+                if killers[slot] == move:
+                    return KILLER_SCORES[slot]
+        color = 0 if mailbox[src_idx][0] == 'w' else 1
+        return self.history[color << 12 | move & 0xfff]
+
+    def order_moves(self, board_state: gl.BoardState, moves: array, ply: int, hash_move: int | None = None) -> list[int]:
+        """
+        Return the arg packed moves as a list sorted by their ordering score, moves with equal scores keep their relative order
+        """
+        return sorted(moves, key = lambda move: self.score_move(board_state, move, ply, hash_move), reverse = True)
+
+    def is_quiet(self, board_state: gl.BoardState, move: int) -> bool:
+        """
+        Return true if the arg packed move is neither a capture nor a promotion in the position of the arg board state
+        """
+        return board_state.mailbox[(move >> 6) & 0x3f] is None and move >> 14 != gl.MOVE_EN_PASSANT and move >> 14 != gl.MOVE_PROMOTION
+
+    def store_cutoff(self, board_state: gl.BoardState, move: int, ply: int, color: int, depth: int):
+        """
+        Record that the arg packed move played by the player of arg color caused a beta cutoff at the arg ply and remaining depth.
+        Only quiet moves are recorded - captures are already ranked well by MVV-LVA
+        """
+        if not self.is_quiet(board_state, move):
+            return
+        if ply < self.max_ply:
+            killers = self.killers[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+        idx = color << 12 | move & 0xfff
+        self.history[idx] += depth * depth
+        if self.history[idx] > HISTORY_LIMIT:
+            for i in range(len(self.history)):
+                self.history[i] >>= 1
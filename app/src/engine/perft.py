@@ -0,0 +1,118 @@
+"""
+Module implementing perft (performance test) - counting all leaf nodes of the legal move tree
+up to a given depth. Used both to verify the move generator against known node counts and
+as the baseline benchmark of raw move generation speed.
+
+Usage:
+    python -m app.src.engine.perft --suite [--depth N]
+    python -m app.src.engine.perft [--fen FEN] --depth N [--divide]
+"""
+
+import argparse
+import sys
+import time
+from app import config as cf
+from app.src.engine import game_logic as gl
+
+PERFT_SUITE = [
+    ('start position', cf.STARTING_POSITION_FEN,
+     {1: 20, 2: 400, 3: 8902, 4: 197281, 5: 4865609}),
+    ('kiwipete', 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+     {1: 48, 2: 2039, 3: 97862, 4: 4085603}),
+    ('position 3', '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+     {1: 14, 2: 191, 3: 2812, 4: 43238, 5: 674624}),
+    ('position 4', 'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1',
+     {1: 6, 2: 264, 3: 9467, 4: 422333}),
+    ('position 4 mirrored', 'r2q1rk1/pP1p2pp/Q4n2/bbp1p3/Np6/1B3NBn/pPPP1PPP/R3K2R b KQ - 0 1',
+     {1: 6, 2: 264, 3: 9467, 4: 422333}),
+    ('position 5', 'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8',
+     {1: 44, 2: 1486, 3: 62379, 4: 2103487}),
+]
+
+
+def perft(board_state: gl.BoardState, depth: int) -> int:
+    """
+    Return the number of leaf nodes of the legal move tree of the arg depth rooted in the arg board state,
+    the board state is left unchanged
+    """
+    moves = board_state.get_all_legal_moves(board_state.to_move)
+    if depth <= 1:
+        return len(moves) if depth == 1 else 1
+    res = 0
+    for move in moves:
+        undo = board_state.make_move(move)
+        res += perft(board_state, depth - 1)
+        board_state.unmake_move(undo)
+    return res
+
+def perft_divide(board_state: gl.BoardState, depth: int) -> dict[str : int]:
+    """
+    Return a dict mapping every legal move of the arg board state in UCI notation to the perft
+    node count of the subtree of the arg depth below it
+    """
+    res = {}
+    for move in board_state.get_all_legal_moves(board_state.to_move):
+        undo = board_state.make_move(move)
+        res[gl.move_to_uci(move)] = perft(board_state, depth - 1)
+        board_state.unmake_move(undo)
+    return res
+
+def run_perft(fen: str, depth: int, divide: bool = False) -> int:
+    """
+    Run perft or perft-divide on the arg fen and print the node count, elapsed time and nodes per second
+    """
+    board_state = gl.BoardState(fen)
+    start = time.perf_counter()
+    if divide:
+        counts = perft_divide(board_state, depth)
+        for uci in sorted(counts):
+            print(f'{uci}: {counts[uci]}')
+        nodes = sum(counts.values())
+    else:
+        nodes = perft(board_state, depth)
+    elapsed = time.perf_counter() - start
+    print(f'depth {depth}: {nodes} nodes in {elapsed:.3f}s ({nodes / max(elapsed, 1e-9):.0f} nodes/s)')
+    return nodes
+
+def run_suite(max_depth: int) -> bool:
+    """
+    Run perft on every position of the suite up to the arg depth, compare with the expected counts and
+    print the results, return true if all counts match else false
+    """
+    success = True
+    total_nodes = 0
+    total_time = 0
+    for name, fen, expected_counts in PERFT_SUITE:
+        for depth, expected in expected_counts.items():
+            if depth > max_depth:
+                break
+            board_state = gl.BoardState(fen)
+            start = time.perf_counter()
+            nodes = perft(board_state, depth)
+            elapsed = time.perf_counter() - start
+            total_nodes += nodes
+            total_time += elapsed
+            status = 'ok' if nodes == expected else f'FAILED (expected {expected})'
+            print(f'{name}, depth {depth}: {nodes} nodes in {elapsed:.3f}s ({nodes / max(elapsed, 1e-9):.0f} nodes/s) {status}')
+            success = success and nodes == expected
+    print(f'total: {total_nodes} nodes in {total_time:.3f}s ({total_nodes / max(total_time, 1e-9):.0f} nodes/s)')
+    return success
+
+def main(argv: list[str] = None) -> int:
+    """
+    Command line entry point
+    """
+    parser = argparse.ArgumentParser(description = 'Perft move generator test and benchmark')
+    parser.add_argument('--fen', default = cf.STARTING_POSITION_FEN, help = 'position to run perft on')
+    parser.add_argument('--depth', type = int, default = 3, help = 'search depth (max depth with --suite)')
+    parser.add_argument('--divide', action = 'store_true', help = 'print node counts below every root move')
+    parser.add_argument('--suite', action = 'store_true', help = 'run the standard position suite with known node counts')
+    args = parser.parse_args(argv)
+    if args.suite:
+        return 0 if run_suite(args.depth) else 1
+    run_perft(args.fen, args.depth, args.divide)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+Module implementing the transposition table used by the move search.
+The table is a fixed number of two-slot buckets indexed by the low bits of the zobrist key. The first slot of a bucket
+is depth-preferred - it is only overwritten by a search at least as deep or by an entry from a newer search, the second slot
+is always replaced. Entries live in preallocated flat arrays, so the memory footprint is set once by the budget in megabytes
+and stays flat for the whole game
+"""
+
+from array import array
+from app import config as cf
+
+BOUND_NONE = 0
+BOUND_EXACT = 1
+BOUND_LOWER = 2
+BOUND_UPPER = 3
+
+# key (8 bytes) + score (4 bytes) + move (2 bytes) + depth, bound and generation (1 byte each)
+ENTRY_SIZE = 17
+BUCKET_SIZE = 2
+
+# scores further from zero than this are mate scores counting the plies from the root to the mate,
+# INF is set far above the largest material balance so the static evaluation never reaches the mate band
+MATE_THRESHOLD = cf.INF - 256
+
+
+class TranspositionTable():
+    """
+    Class representing a transposition table with bounded memory and a depth-preferred/always-replace bucket scheme
+    """
+    def __init__(self, size_mb: float = cf.TRANSPOSITION_TABLE_SIZE_MB):
+        """
+        TranspositionTable takes its memory budget in megabytes as a constructor argument,
+        the number of buckets is the largest power of two fitting in the budget
+        """
+        bucket_count = 1
+        while bucket_count * 2 * BUCKET_SIZE * ENTRY_SIZE <= size_mb * 1024 * 1024:
+            bucket_count *= 2
+        self.bucket_mask = bucket_count - 1
+        self.size = bucket_count * BUCKET_SIZE
+        self.keys = array('Q', bytes(8 * self.size))
+        self.scores = array('i', bytes(4 * self.size))
+        self.moves = array('H', bytes(2 * self.size))
+        self.depths = array('b', bytes(self.size))
+        self.bounds = array('B', bytes(self.size))
+        self.generations = array('B', bytes(self.size))
+        self.generation = 0
+
+    def clear(self):
+        """
+        Remove all entries from the table
+        """
+        for table in (self.keys, self.scores, self.moves, self.depths, self.bounds, self.generations):
+            table[:] = array(table.typecode, bytes(table.itemsize * self.size))
+        self.generation = 0
+
+    def new_search(self):
+        """
+        Start a new search generation, deep entries left over from previous searches become replaceable
+        """
+        self.generation = (self.generation + 1) & 0xff
+
+    def probe(self, key: int) -> tuple[int, int, int, int] | None:
+        """
+        Return the (depth, score, bound, move) entry stored for the arg zobrist key or None if there is none
+        """
+        slot = (key & self.bucket_mask) * BUCKET_SIZE
+        for slot in (slot, slot + 1):
+            if self.keys[slot] == key and self.bounds[slot] != BOUND_NONE:
+                return self.depths[slot], self.scores[slot], self.bounds[slot], self.moves[slot]
+        return None
+
+    def probe_move(self, key: int) -> int | None:
+        """
+        Return the best move stored for the arg zobrist key in the packed integer form or None if there is none
+        """
+        entry = self.probe(key)
+        if entry is None or entry[3] == 0:
+            return None
+        return entry[3]
+
+    def store(self, key: int, depth: int, score: int, bound: int, move: int | None):
+        """
+        Store a search result for the arg zobrist key. The depth-preferred slot takes the entry if it holds the same position,
+        an entry from an older search or a shallower one, otherwise the always-replace slot does.
+        A missing best move keeps the move already stored for the same position
+        """
+        slot = (key & self.bucket_mask) * BUCKET_SIZE
+        if not (self.keys[slot] == key or self.bounds[slot] == BOUND_NONE or self.generations[slot] != self.generation or
+                depth >= self.depths[slot]):
+            slot += 1
+        if move is None:
+            move = self.moves[slot] if self.keys[slot] == key else 0
+        self.keys[slot] = key
+        self.scores[slot] = score
+        self.moves[slot] = move
+        self.depths[slot] = depth
+        self.bounds[slot] = bound
+        self.generations[slot] = self.generation
+
+
+def score_to_table(score: int, ply: int) -> int:
+    """
+    Return the arg search score converted for storing at a node the arg number of plies from the root -
+    mate scores are made relative to the node so they stay valid when the position is reached at a different ply
+    """
+    if score > MATE_THRESHOLD:
+        return score + ply
+    if score < -MATE_THRESHOLD:
+        return score - ply
+    return score
+
+def score_from_table(score: int, ply: int) -> int:
+    """
+    Return the arg stored score converted back to a search score at a node the arg number of plies from the root
+    """
+    if score > MATE_THRESHOLD:
+        return score - ply
+    if score < -MATE_THRESHOLD:
+        return score + ply
+    return score
@@ -0,0 +1,43 @@
+"""
+Module implementing the random keys used for Zobrist hashing of board states.
+The keys are generated from a fixed seed, so position hashes are identical across processes and runs
+"""
+
+import random
+
+ZOBRIST_SEED = 0x5a0b1257
+
+_rng = random.Random(ZOBRIST_SEED)
+
+PIECE_KEYS = {piece_type : [_rng.getrandbits(64) for _ in range(64)] for piece_type in
+              ['wp', 'wn', 'wb', 'wr', 'wq', 'wk', 'bp', 'bn', 'bb', 'br', 'bq', 'bk']}
+BLACK_TO_MOVE_KEY = _rng.getrandbits(64)
+WHITE_OO_KEY = _rng.getrandbits(64)
+WHITE_OOO_KEY = _rng.getrandbits(64)
+BLACK_OO_KEY = _rng.getrandbits(64)
+BLACK_OOO_KEY = _rng.getrandbits(64)
+EN_PASSANT_FILE_KEYS = [_rng.getrandbits(64) for _ in range(8)]
+
+
+def castling_key(white_oo: bool, white_ooo: bool, black_oo: bool, black_ooo: bool) -> int:
+    """
+    Return the combined key of the castling rights in argument
+    """
+    res = 0
+    if white_oo:
+        res ^= WHITE_OO_KEY
+    if white_ooo:
+        res ^= WHITE_OOO_KEY
+    if black_oo:
+        res ^= BLACK_OO_KEY
+    if black_ooo:
+        res ^= BLACK_OOO_KEY
+    return res
+
+def en_passant_key(en_passant_idx: int) -> int:
+    """
+    Return the key of the en passant target square with the arg index, or 0 if the index is negative (no target square)
+    """
+    if en_passant_idx < 0:
+        return 0
+    return EN_PASSANT_FILE_KEYS[en_passant_idx % 8]
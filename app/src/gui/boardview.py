@@ -6,7 +6,6 @@ from app.src.engine import chessboard
 from app.src.gui import piece
 import pygame as pg
 from app import config as cf
-import numpy as np
 from app.src.engine.clock import ChessClock
 
 class BoardView():
@@ -38,7 +37,7 @@ class BoardView():
         self.topleft = cf.DEFAULT_BOARD_TOPLEFT
         
 
-    def get_square_rect(self, pos: np.uint64) -> tuple[pg.Rect, int]:
+    def get_square_rect(self, pos: int) -> tuple[pg.Rect, int]:
         """
         Return rectangle with dimensions and coordinates corresponding to the chessboard square with the arg index
         """
@@ -107,24 +106,24 @@ class BoardView():
                 else:
                     pg.draw.circle(res, tuple(int(c * self.legal_move_mult) for c in col), rect.center, rect.width // 6)                
 
-        piece_positions = self.chessboard.board_state.get_piece_positions()
+        selected_idx = gl.bb_to_idx(selected_src) if selected_src is not None else None
         last_to_draw_parameters = None
-        for piece_type in piece_positions:
-            for pos in gl.generate_positions(piece_positions[piece_type]):
-                if promotion_square is not None and selected_src is not None and selected_src == pos:
-                    continue
-                if drag is True and selected_src is not None and selected_src == pos:
-                    last_to_draw_parameters = (piece_type, mouse_x, mouse_y)
-                    continue
-                else:
-                    idx = gl.bb_to_idx(pos)
-                    if self.flip:
-                        idx = 63 - idx
-                    rank = idx // 8
-                    file = idx % 8
-                    x = self.width * file // 8
-                    y = self.height - (self.height * rank // 8)
-                    self.pieces[piece_type].render(x, y, res)
+        for idx, piece_type in enumerate(self.chessboard.board_state.get_mailbox()):
+            if piece_type is None:
+                continue
+            if promotion_square is not None and selected_idx == idx:
+                continue
+            if drag is True and selected_idx == idx:
+                last_to_draw_parameters = (piece_type, mouse_x, mouse_y)
+                continue
+            else:
+                if self.flip:
+                    idx = 63 - idx
+                rank = idx // 8
+                file = idx % 8
+                x = self.width * file // 8
+                y = self.height - (self.height * rank // 8)
+                self.pieces[piece_type].render(x, y, res)
         if last_to_draw_parameters is not None:
             self.pieces[last_to_draw_parameters[0]].render(last_to_draw_parameters[1], last_to_draw_parameters[2], res, True)
         if self.chessclock is not None:
@@ -133,39 +132,39 @@ class BoardView():
             return self.render_promotion_menu(res, promotion_square)
         return res
     
-    def render_promotion_menu(self, board: pg.Surface, promotion_square: np.uint64) -> pg.Surface:
+    def render_promotion_menu(self, board: pg.Surface, promotion_square: int) -> pg.Surface:
         """
         Render the promotion menu into the chessboard at the respective promotion square
         """
-        if promotion_square & np.uint64(0xff) != 0:
+        if promotion_square & 0xff != 0:
             for i, type in enumerate(['bq', 'bn', 'br', 'bb']):
-                pos = promotion_square << np.uint64(i * 8)
+                pos = promotion_square << i * 8
                 rect, _ = self.get_square_rect(pos)
                 pg.draw.rect(board, self.promotion_menu_color, rect)
                 self.pieces[type].render(rect.bottomleft[0], rect.bottomleft[1], board)
             return board
         for i, type in enumerate(['wq', 'wn', 'wr', 'wb']):
-            pos = promotion_square >> np.uint64(i * 8)
+            pos = promotion_square >> i * 8
             rect, _ = self.get_square_rect(pos)
             pg.draw.rect(board, self.promotion_menu_color, rect)
             self.pieces[type].render(rect.bottomleft[0], rect.bottomleft[1], board)
         return board
     
-    def get_pos(self, x: int, y: int) -> np.uint64:
+    def get_pos(self, x: int, y: int) -> int:
         """
         Return bitboard of the position of the chess square containing the pixel with (x, y) coordinates from the arg
         """
         x -= self.topleft[0]
         y -= self.topleft[1]
         if (x not in range(self.width) or y not in range(self.height)):
-            return np.uint64(0)
+            return 0
         if self.flip:
             rank = y // self.square_height
             file = 7 - (x // self.square_width)
         else:
             rank = 7 - (y // self.square_height)
             file = x // self.square_width
-        pos = np.uint64(1 << (rank * 8 + file))
+        pos = 1 << (rank * 8 + file)
         return pos
     
     def render_clock(self, board: pg.Surface) -> pg.Surface:
@@ -6,7 +6,6 @@ import pygame as pg
 from app.src.engine import chessboard
 from app.src.gui import boardview
 from app.src.engine import game_logic as gl
-import numpy as np
 
 
 class InputHandler():
@@ -33,7 +32,7 @@ class InputHandler():
         Set the FSM to the initial state
         """
         self.selected_src = None
-        self.legal_moves = np.uint64(0)
+        self.legal_moves = 0
         self.drag = False
         self.promotion_square = None
         self.state = self.no_piece_selected
@@ -123,15 +122,15 @@ class InputHandler():
                 if event.type == pg.MOUSEBUTTONDOWN:
                     self.mouse_x, self.mouse_y = event.pos
                     pos = self.board_view.get_pos(self.mouse_x, self.mouse_y)
-                    if self.promotion_square & np.uint64(0xff) != 0:
+                    if self.promotion_square & 0xff != 0:
                         for i, type in enumerate(['q', 'n', 'r', 'b']):
-                            if pos & self.promotion_square << np.uint64(8 * i) != 0:
+                            if pos & self.promotion_square << 8 * i != 0:
                                 res = gl.Move(self.selected_src, self.promotion_square, 'p', 'b', type)
                                 self.clear()
                                 return res
-                    if self.promotion_square & np.uint64(0xff00000000000000) != 0:
+                    if self.promotion_square & 0xff00000000000000 != 0:
                         for i, type in enumerate(['q', 'n', 'r', 'b']):
-                            if pos & self.promotion_square >> np.uint64(8 * i) != 0:
+                            if pos & self.promotion_square >> 8 * i != 0:
                                 res = gl.Move(self.selected_src, self.promotion_square, 'p', 'w', type)
                                 self.clear()
                                 return res
@@ -4,6 +4,7 @@ Module for the computer player class
 
 from app.src.player import player
 from app.src.engine import chessboard, ai
+from app.src.engine.clock import ChessClock
 from app import config as cf
 
 
@@ -11,21 +12,24 @@ class ComputerPlayer(player.Player):
     """
     Computer player class
     """
-    def __init__(self, color: int, chessboard: chessboard.Chessboard):
+    def __init__(self, color: int, chessboard: chessboard.Chessboard, chessclock: ChessClock = None):
         super().__init__(color, chessboard)
+        self.chessclock = chessclock
         self.ai = ai.AI()
 
     def get_move(self):
         """
         Polls the member AI object for a move, returns it if there is one else returns None
+        The AI budgets its thinking time from the chess clock if the game is played with one
         """
-        return self.ai.poll_for_move(self.chessboard)
+        return self.ai.poll_for_move(self.chessboard, self.chessclock)
     
-    def stop_calculating(self):
+    def stop_calculating(self) -> bool:
         """
-        Disallows AI object to calculate moves
+        Disallows AI object to calculate moves and stops its running searches,
+        returns True if no search thread is left running
         """
-        self.ai.quit()
+        return self.ai.quit()
         
 
 
@@ -0,0 +1,43 @@
+"""
+Tests of the search scores and limits of the AI
+"""
+
+import unittest
+from app import config as cf
+from app.src.engine import ai, game_logic as gl, transposition as tt
+
+# white has every piece promoted to a queen against a bare king
+HUGE_MATERIAL_FEN = 'k7/pp6/8/QQQQQQQQ/Q7/RRBBNN2/8/7K w - - 0 1'
+
+
+class TestScores(unittest.TestCase):
+    def test_huge_material_stays_below_mate_band(self):
+        board_state = gl.BoardState(HUGE_MATERIAL_FEN)
+        eval = ai.AI(ponder = False, book_path = None).evaluate(board_state)
+        self.assertGreater(eval, 0)
+        self.assertLess(eval, tt.MATE_THRESHOLD)
+        self.assertEqual(tt.score_to_table(eval, 5), eval)
+        self.assertEqual(tt.score_from_table(eval, 5), eval)
+
+    def test_aspiration_search_ends_at_full_window(self):
+        board_state = gl.BoardState(HUGE_MATERIAL_FEN)
+        engine = ai.AI(ponder = False, book_path = None)
+        engine.minimax_with_pruning = lambda *args, **kwargs: (cf.INF, None)
+        self.assertEqual(engine.aspiration_search(board_state, 0, 2, 0), (cf.INF, None))
+        engine.minimax_with_pruning = lambda *args, **kwargs: (-cf.INF, None)
+        self.assertEqual(engine.aspiration_search(board_state, 0, 2, 0), (-cf.INF, None))
+
+
+class TestParallelSearch(unittest.TestCase):
+    def test_tables_share_the_budget(self):
+        engine = ai.AI(workers = 3, ponder = False, book_path = None, table_size_mb = 8)
+        try:
+            worker_table = tt.TranspositionTable(engine.table_share_mb())
+            entries = engine.transposition_table.size + engine.workers * worker_table.size
+            self.assertLessEqual(entries * tt.ENTRY_SIZE, 8 * 1024 * 1024)
+        finally:
+            engine.quit()
+
+
+if __name__ == '__main__':
+    unittest.main()